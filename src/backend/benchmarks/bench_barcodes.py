@@ -0,0 +1,150 @@
+"""
+Latency and recall of barcode_detect's scan modes on synthetic photos.
+
+Each scene is a 12 MP (4000x3000) textured photo with decodable barcodes
+pasted at several sizes and angles: EAN-13 symbols drawn here, plus QR codes
+and Code 128 when zxing-cpp can write them. Every configuration -- the full
+read and the pyramid at each effort, with all formats and with --formats --
+runs on the same scenes; recall counts ground-truth symbols whose center lies
+inside a detected quad. Configurations that miss anything the full read finds
+are flagged: barcode_detect keeps mode="full" as its default until the
+pyramid matches it.
+
+    python benchmarks/bench_barcodes.py [--scenes 4] [--repeat 3] [--formats EAN13,QRCode,Code128]
+
+Without zxing-cpp installed the stub reader from stub_backends is used, which
+only exercises the plumbing: its timings say nothing about zxing.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# EAN-13: L and G codes for the left half (chosen by the first digit's parity pattern), R for the right
+_L = ["0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011"]
+_G = ["".join("1" if c == "0" else "0" for c in code[::-1]) for code in _L]
+_R = ["".join("1" if c == "0" else "0" for c in code) for code in _L]
+_PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+
+def ean13_modules(digits12: str) -> str:
+    d = [int(c) for c in digits12]
+    check = (10 - sum(x * (3 if i % 2 else 1) for i, x in enumerate(d)) % 10) % 10
+    d.append(check)
+    left = "".join((_L if p == "L" else _G)[x] for p, x in zip(_PARITY[d[0]], d[1:7]))
+    right = "".join(_R[x] for x in d[7:])
+    return "101" + left + "01010" + right + "101"
+
+
+def ean13_image(digits12: str, module: int, height: int) -> np.ndarray:
+    bits = np.array([c == "1" for c in ean13_modules(digits12)])
+    row = np.where(np.repeat(bits, module), 0, 255).astype(np.uint8)
+    quiet = np.full(10 * module, 255, np.uint8)
+    return np.tile(np.concatenate([quiet, row, quiet]), (height, 1))
+
+
+def zxing_image(fmt: str, text: str, size: int):
+    """QR / Code 128 from zxing-cpp's writer, or None if it has none."""
+    try:
+        import zxingcpp
+        return np.array(zxingcpp.write_barcode(getattr(zxingcpp.BarcodeFormat, fmt), text, size, size // (1 if fmt == "QRCode" else 4)))
+    except Exception:
+        return None
+
+
+def paste(scene, symbol, cx, cy, angle):
+    """Paste a grayscale symbol rotated by angle at (cx, cy). Returns its corner quad."""
+    h, w = symbol.shape[:2]
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    cos, sin = abs(M[0, 0]), abs(M[0, 1])
+    bw, bh = int(h * sin + w * cos) + 2, int(h * cos + w * sin) + 2
+    M[0, 2] += bw / 2 - w / 2
+    M[1, 2] += bh / 2 - h / 2
+    rotated = cv2.warpAffine(symbol, M, (bw, bh), borderValue=255)
+    inside = cv2.warpAffine(np.full_like(symbol, 255), M, (bw, bh)) > 0
+    x0, y0 = cx - bw // 2, cy - bh // 2
+    region = scene[y0:y0 + bh, x0:x0 + bw]
+    region[inside] = rotated[inside][:, None]
+    corners = np.array([[0, 0], [w, 0], [w, h], [0, h]], np.float32)
+    return (cv2.transform(corners[None], M)[0] + (x0, y0)).astype(np.int32)
+
+
+def make_scene(seed, W=4000, H=3000):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:H, 0:W]
+    base = (90 + 60 * np.sin(xx / 310.0 + seed) + 40 * np.cos(yy / 270.0)).astype(np.float32)
+    scene = np.clip(base[..., None] + rng.normal(0, 12, (H, W, 3)), 0, 255).astype(np.uint8)
+    symbols = []
+    for k, module in enumerate((2, 3, 4, 6)):
+        digits = "".join(str(d) for d in rng.integers(0, 10, 12))
+        symbols.append(ean13_image(digits, module, 60 * module))
+    for fmt, size in (("QRCode", 240), ("QRCode", 480), ("Code128", 600)):
+        img = zxing_image(fmt, f"RB-{seed}-{size}", size)
+        if img is not None:
+            symbols.append(img)
+    truth, cells = [], [(c, r) for r in range(3) for c in range(4)]
+    for sym, cell in zip(symbols, rng.permutation(len(cells))[:len(symbols)]):
+        c, r = cells[cell]
+        angle = float(rng.choice([0, 0, 90, 12, -20]))
+        truth.append(paste(scene, sym, 500 + c * 1000, 500 + r * 1000, angle))
+    return scene, truth
+
+
+def recall(found, truth):
+    hits = 0
+    for quad in truth:
+        c = quad.mean(axis=0)
+        hits += any(cv2.pointPolygonTest(f.reshape(-1, 1, 2), (float(c[0]), float(c[1])), False) >= 0 for f in found)
+    return hits / max(1, len(truth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare barcode scan modes on synthetic 12 MP photos")
+    parser.add_argument("--scenes", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--formats", default="EAN13,QRCode,Code128", help="Restricted set for the *_formats runs")
+    args = parser.parse_args()
+
+    try:
+        import zxingcpp  # noqa: F401
+        reader = "zxing-cpp"
+    except ImportError:
+        import stub_backends
+        stub_backends.install()
+        reader = "stub (timings not meaningful)"
+    import barcode_detect
+
+    scenes = [make_scene(seed) for seed in range(args.scenes)]
+    print(f"[bench] reader={reader} scenes={len(scenes)} symbols={sum(len(t) for _, t in scenes)}")
+    configs = [("full", dict(mode="full", formats=""))]
+    for effort in barcode_detect.EFFORTS:
+        configs.append((f"pyramid_{effort}", dict(mode="pyramid", effort=effort, formats="")))
+    configs.append(("pyramid_balanced_formats", dict(mode="pyramid", effort="balanced", formats=args.formats)))
+
+    baseline = full_recall = None
+    for name, kwargs in configs:
+        times, recalls = [], []
+        for scene, truth in scenes:
+            runs = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                found = barcode_detect.predict(scene, **kwargs)
+                runs.append(time.perf_counter() - t0)
+            assert found.dtype == np.int32 and found.shape[1:] == (4, 2)
+            times.append(statistics.median(runs))
+            recalls.append(recall(found, truth))
+        ms, rec = statistics.mean(times) * 1000, statistics.mean(recalls)
+        baseline = baseline or ms
+        full_recall = rec if full_recall is None else full_recall
+        flag = "  < full" if rec < full_recall else ""
+        print(f"{name:26s} ms/image={ms:8.1f}  speedup={baseline / ms:5.2f}x  recall={rec:.3f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
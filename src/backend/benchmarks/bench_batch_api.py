@@ -0,0 +1,135 @@
+"""
+End-to-end check of the /redact/batch endpoint.
+
+Posts a mix of loose images and a zip archive (plus a non-image entry and an
+undecodable "image") through fastapi's TestClient and reads the whole
+response, for both ndjson and zip output. The uploads are closed by FastAPI
+as soon as the handler returns, so this catches any input that is still read
+from them while the response streams. Every input must come back once, in
+order, with an image (or its error) and metadata; any miss exits with status 1.
+
+The models are the deterministic stubs from stub_backends and the worker pool
+runs main.redact_images in-process, so no weights or worker processes are needed.
+
+    python benchmarks/bench_batch_api.py [--images 12] [--batch-size 4]
+"""
+import os
+import sys
+import io
+import json
+import time
+import base64
+import argparse
+import zipfile
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stub_backends  # noqa: E402
+
+stub_backends.install()
+os.environ.setdefault("REDACT_CACHE_MB", "0")
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+
+async def redact_in_process(imgs, **kwargs):
+    import main
+    return await run_in_threadpool(main.redact_images, imgs, **kwargs)
+
+
+def png(rng, i):
+    img = np.full((120 + 8 * i, 200, 3), 235, np.uint8)
+    cv2.putText(img, f"Name: Alice Smith {i}", (5, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (20, 20, 20), 2)
+    img[90:] = rng.integers(0, 256, img[90:].shape, dtype=np.uint8)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def build_files(n):
+    """Multipart files and the expected [(filename, ok)] in input order."""
+    rng = np.random.default_rng(0)
+    files, expected = [], []
+    for i in range(n // 2):
+        name = f"loose_{i}.png"
+        files.append(("files", (name, png(rng, i), "image/png")))
+        expected.append((name, True))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for i in range(n // 2, n):
+            z.writestr(f"scans/page_{i}.png", png(rng, i))
+            expected.append((f"scans/page_{i}.png", True))
+        z.writestr("scans/readme.txt", b"not an image")  # skipped
+        z.writestr("scans/broken.png", b"not a png")
+        expected.append(("scans/broken.png", False))
+    files.append(("files", ("pages.zip", buf.getvalue(), "application/zip")))
+    return files, expected
+
+
+def check(records, expected, fmt):
+    """Problems with records [(filename, has_image, has_meta, error)] against expected."""
+    if [r[0] for r in records] != [name for name, _ in expected]:
+        return [f"{fmt}: got {[r[0] for r in records]}, expected {[name for name, _ in expected]}"]
+    problems = []
+    for (name, has_image, has_meta, error), (_, ok) in zip(records, expected):
+        if ok and (error or not has_image or not has_meta):
+            problems.append(f"{fmt}: {name} came back without its image or metadata ({error})")
+        if not ok and not error:
+            problems.append(f"{fmt}: {name} should have failed to decode")
+    return problems
+
+
+def ndjson_records(body):
+    records = []
+    for line in body.decode().splitlines():
+        r = json.loads(line)
+        image = base64.b64decode(r["image"]) if "image" in r else b""
+        decoded = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR) if image else None
+        records.append((r["filename"], decoded is not None, "meta" in r, r.get("error")))
+    return records
+
+
+def zip_records(body):
+    records = []
+    with zipfile.ZipFile(io.BytesIO(body)) as z:
+        names = z.namelist()
+        for name in sorted(n for n in names if n.endswith(".json")):
+            r = json.loads(z.read(name))
+            stem = name[:-len(".json")]
+            images = [n for n in names if n.startswith(stem + ".") and n != name]
+            decoded = cv2.imdecode(np.frombuffer(z.read(images[0]), np.uint8), cv2.IMREAD_COLOR) if images else None
+            records.append((r["filename"], decoded is not None, "meta" in r, r.get("error")))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call /redact/batch and check every input comes back")
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+
+    server.POOL.redact_images = redact_in_process
+    files, expected = build_files(args.images)
+    client = TestClient(server.app)  # no startup hooks: the pool is never spawned
+    failed = []
+    for fmt, parse in (("ndjson", ndjson_records), ("zip", zip_records)):
+        t0 = time.perf_counter()
+        resp = client.post("/redact/batch", params={"format": fmt, "batch_size": args.batch_size}, files=files)
+        elapsed = time.perf_counter() - t0
+        if resp.status_code != 200:
+            problems = [f"{fmt}: status {resp.status_code} {resp.text[:200]}"]
+        else:
+            problems = check(parse(resp.content), expected, fmt)
+        for p in problems:
+            print(f"[bench] {p}")
+        status = "FAIL" if problems else "ok"
+        print(f"{fmt:7s} inputs={len(expected)}  {status}  ms={elapsed * 1000:.0f}")
+        if problems:
+            failed.append(fmt)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Equality check and timings for effects.apply_effect.
+
+apply_effect works on padded crops around the masked regions; its output must
+be identical to running the effect on the whole frame and copying it in
+under the mask. This compares both for every effect ("blur", "pixelate",
+"black") over odd frame sizes -- where a block grid or rounding slip shows up
+as a one-block offset -- and random masks, with and without `dilate`.
+Exits with status 1 on the first mismatch.
+
+    python benchmarks/bench_effects.py [--cases 60] [--ksize 31] [--pixel-div 24]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import effects  # noqa: E402
+
+EFFECTS = ("blur", "pixelate", "black")
+
+
+def full_frame(frame, mask, effect, k, dilate, pixel_div):
+    """The effect on the whole frame, copied in where the (dilated) mask is set."""
+    if dilate > 1:
+        mask = cv2.dilate(mask, np.ones((dilate, dilate), np.uint8), 1)
+    h, w = frame.shape[:2]
+    if effect == "blur":
+        mod = cv2.GaussianBlur(frame, (k, k), 0)
+    elif effect == "pixelate":
+        small = cv2.resize(frame, (max(1, w // pixel_div), max(1, h // pixel_div)), interpolation=cv2.INTER_LINEAR)
+        mod = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+    else:
+        mod = np.zeros_like(frame)
+    out = frame.copy()
+    out[mask > 0] = mod[mask > 0]
+    return out
+
+
+def random_mask(rng, h, w):
+    mask = np.zeros((h, w), np.uint8)
+    for _ in range(int(rng.integers(1, 5))):
+        cx, cy = int(rng.integers(0, w)), int(rng.integers(0, h))
+        pts = cv2.boxPoints(((cx, cy), (rng.uniform(5, w / 2), rng.uniform(5, h / 2)), rng.uniform(-90, 90)))
+        cv2.fillPoly(mask, [np.round(pts).astype(np.int32).reshape(-1, 1, 2)], 255)
+    return mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check apply_effect against the full-frame effect")
+    parser.add_argument("--cases", type=int, default=60, help="Frames per effect")
+    parser.add_argument("--ksize", type=int, default=31)
+    parser.add_argument("--pixel-div", type=int, default=24)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for effect in EFFECTS:
+        full_s = crop_s = 0.0
+        for case in range(args.cases):
+            h, w = int(rng.integers(30, 700)) | 1, int(rng.integers(30, 900)) | 1  # odd sizes
+            frame = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+            mask = random_mask(rng, h, w)
+            dilate = int(rng.choice([0, 0, 7]))
+            t0 = time.perf_counter()
+            expected = full_frame(frame, mask, effect, args.ksize, dilate, args.pixel_div)
+            full_s += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            got = effects.apply_effect(frame, mask, effect=effect, k=args.ksize, dilate=dilate, pixel_div=args.pixel_div)
+            crop_s += time.perf_counter() - t0
+            diff = int(np.count_nonzero((got != expected).any(axis=2)))
+            if diff:
+                print(f"[bench] {effect} {w}x{h} dilate={dilate}: {diff} px differ from the full-frame effect")
+                sys.exit(1)
+        print(f"{effect:9s} cases={args.cases}  identical  full_ms={full_s * 1000 / args.cases:.2f}  crops_ms={crop_s * 1000 / args.cases:.2f}")
+
+
+if __name__ == "__main__":
+    main()
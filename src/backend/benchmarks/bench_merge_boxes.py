@@ -0,0 +1,105 @@
+"""
+Scaling benchmark for ocr_detect.merge_boxes_and_texts.
+
+Builds synthetic document layouts (rows of word boxes, like receipts/forms)
+from 10 to 10k boxes, checks the merged groups against the original pairwise
+implementation (up to --ref-max boxes, it is quadratic) and prints timings.
+
+    python benchmarks/bench_merge_boxes.py [--sizes 10,100,1000,10000] [--merge-dist 12]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr_detect  # noqa: E402
+
+
+def synthetic_polys(n, seed=0):
+    """n word boxes laid out in rows and columns with jitter, as 4-point int polygons."""
+    rng = np.random.default_rng(seed)
+    cols = max(1, int(np.sqrt(n) * 0.6))
+    polys, texts = [], []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        w, h = int(rng.integers(20, 90)), int(rng.integers(12, 22))
+        x = c * 110 + int(rng.integers(0, 15))
+        y = r * 34 + int(rng.integers(0, 8))
+        polys.append([[x, y], [x + w, y], [x + w, y + h], [x, y + h]])
+        texts.append(f"w{i}")
+    return polys, texts
+
+
+def reference_merge(rec_polys, rec_texts, merge_dist):
+    """The original O(n^2) implementation, kept for equality checks."""
+    n = len(rec_polys)
+    rects, polys_pts = [], []
+    for p in rec_polys:
+        pts = np.asarray(p, dtype=np.int32).reshape(-1, 2)
+        polys_pts.append(pts)
+        x, y, w, h = cv2.boundingRect(pts)
+        rects.append((x, y, x + w, y + h))
+    parent = list(range(n))
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+    d = merge_dist
+    def expanded(r):
+        return (r[0] - d, r[1] - d, r[2] + d, r[3] + d)
+    def intersects(r1, r2):
+        return not (r1[2] < r2[0] or r2[2] < r1[0] or r1[3] < r2[1] or r2[3] < r1[1])
+    for i in range(n):
+        ri = expanded(rects[i])
+        for j in range(i + 1, n):
+            if intersects(ri, expanded(rects[j])):
+                ra, rb = find(i), find(j)
+                if ra != rb:
+                    parent[rb] = ra
+    groups = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    merged_texts, merged_polys = [], []
+    for idxs in groups.values():
+        idxs_sorted = sorted(idxs, key=lambda k: (rects[k][1], rects[k][0]))
+        merged_texts.append(" ".join(rec_texts[k] for k in idxs_sorted).strip())
+        hull = cv2.convexHull(np.vstack([polys_pts[k] for k in idxs])).reshape(-1, 2)
+        merged_polys.append(hull.tolist())
+    return merged_texts, merged_polys
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR box merging")
+    parser.add_argument("--sizes", default="10,100,1000,3000,10000")
+    parser.add_argument("--merge-dist", type=int, default=12)
+    parser.add_argument("--ref-max", type=int, default=3000, help="Largest size to also run the quadratic reference on")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'boxes':>7} {'groups':>7} {'merge_ms':>10} {'reference_ms':>13} {'speedup':>8}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        polys, texts = synthetic_polys(n)
+        t_new, (m_texts, m_polys) = best_of(lambda: ocr_detect.merge_boxes_and_texts(polys, texts, args.merge_dist), args.repeat)
+        ref = speed = "-"
+        if n <= args.ref_max:
+            t_ref, expected = best_of(lambda: reference_merge(polys, texts, args.merge_dist), 1)
+            assert (m_texts, m_polys) == expected, f"merged groups differ at n={n}"
+            ref, speed = f"{t_ref * 1e3:.1f}", f"{t_ref / t_new:.1f}x"
+        print(f"{n:>7} {len(m_texts):>7} {t_new * 1e3:>10.2f} {ref:>13} {speed:>8}")
+
+
+if __name__ == "__main__":
+    main()
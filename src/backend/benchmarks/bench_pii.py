@@ -0,0 +1,230 @@
+"""
+Accuracy parity and latency of the PII backends (pii_detect.BACKENDS).
+
+Runs a fixed corpus -- OCR-like lines with names, emails, phone and card
+numbers, addresses and IDs, mixed with plain text -- through each backend,
+bypassing the verdict cache, and compares its redaction spans with those of
+the reference backend (the first one listed, "torch" by default):
+
+  exact      share of lines whose spans (range and type) match exactly
+  char_f1    F1 of the redacted characters against the reference
+  type_agree share of reference-redacted characters given the same PII type
+
+Latency is the median of --repeat passes over the corpus, at --batch-size
+lines per model call and one line per call.
+
+The rule cascade (pii_detect.CASCADES) is checked the same way: the spans of
+predict_batch with each cascade mode against cascade="off" (model only, the
+configured backend), with the share of lines that skipped the model and the
+time for the corpus from a cold verdict cache. The rules must also stay off
+NUMERIC -- dates, times, amounts and reference numbers with nothing to redact:
+a rule span there is redacted without the model ever seeing the line.
+
+    python benchmarks/bench_pii.py [--backends torch,int8,onnx,onnx-int8] [--repeat 3]
+
+Exits with status 1 if a backend's char_f1 is below --min-f1 or a rule fires
+on a NUMERIC line.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pii_detect  # noqa: E402
+import pii_rules  # noqa: E402
+
+NAMES = ["Alice Johnson", "Dhanushkumar R", "Maria Garcia", "Chen Wei", "Olga Petrova", "James O'Brien"]
+EMAILS = ["alice.johnson@example.com", "m.garcia@correo.es", "chen.wei88@mail.cn", "support@acme.io"]
+PHONES = ["+44 7700 900123", "(555) 010-4477", "+91 90803 47012", "030 1234567"]
+CARDS = ["4605 1700 1002 6518", "5500-0000-0000-0004", "3714 496353 98431"]
+ADDRESSES = ["221B Baker Street, London NW1 6XE", "12 Rue de Rivoli, 75001 Paris", "Unter den Linden 5, 10117 Berlin"]
+IDS = ["SSN 078-05-1120", "Passport X1234567", "DOB 14/03/1987", "IBAN DE89 3704 0044 0532 0130 00"]
+TEMPLATES = [
+    "Name: {name}",
+    "Contact {name} at {email}",
+    "Phone: {phone}",
+    "Card number {card} exp 08/27",
+    "{name}, {address}",
+    "Ship to: {address}",
+    "Email {email} / Tel {phone}",
+    "{id}",
+    "Patient: {name}  {id}",
+]
+PLAIN = [
+    "Invoice total due on receipt",
+    "Thank you for your order",
+    "Items shipped in two parcels",
+    "Subtotal 42.50 VAT 8.50 Total 51.00",
+    "Page 2 of 3",
+    "Terms and conditions apply",
+    "Reference INV-2024-0042",
+    "Qty 3 x Widget, blue",
+    "Please keep this receipt",
+    "Opening hours 9:00 - 17:30",
+]
+# Numeric lines with nothing to redact (rule precision)
+NUMERIC = [
+    "01.02.2023", "31/12/2024", "2023-01-02", "Date: 01.02.2023", "Due 05/03/24",
+    "01.02.2023 - 05.02.2023", "01.02.23 - 05.02.23", "(01.02.2023)", "Period 01/2024 - 12/2024",
+    "Invoice 0042/2024", "Lot 0815-2291", "Order 2024/0042", "Page 01 / 12",
+    "08:30 - 17:30", "Total 1.234,56 EUR", "Qty 0.25 kg", "0.5 x 120.00", "v1.2.3",
+    "Invoice 0123456789", "Order #0000123456", "Account 0044 0532 0130",
+]
+# OCR fragments with nothing to redact
+TRIVIAL = ["total", "qty", "12", "3.50", "---", "#", "page", "x2", "EUR", "No."]
+
+
+def corpus():
+    """Deterministic list of lines: every template with rotating values, plus plain text."""
+    lines = []
+    for i in range(len(NAMES) * 2):
+        values = {
+            "name": NAMES[i % len(NAMES)],
+            "email": EMAILS[i % len(EMAILS)],
+            "phone": PHONES[i % len(PHONES)],
+            "card": CARDS[i % len(CARDS)],
+            "address": ADDRESSES[i % len(ADDRESSES)],
+            "id": IDS[i % len(IDS)],
+        }
+        lines.extend(t.format(**values) for t in TEMPLATES)
+    lines.extend(PLAIN * 3)
+    lines.extend(TRIVIAL)
+    lines.extend(NUMERIC)
+    lines.extend(EMAILS + PHONES + CARDS)  # lone values, as OCR often splits them off
+    # Unique lines only: repeats would be cache hits in production
+    return list(dict.fromkeys(lines))
+
+
+def spans_of(texts, backend, batch_size):
+    tokens = pii_detect._infer(texts, batch_size=batch_size, backend=backend)
+    return {t: pii_detect.decode_spans(tokens[t], len(t)) for t in texts}
+
+
+def time_backend(texts, backend, batch_size, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        pii_detect._infer(texts, batch_size=batch_size, backend=backend)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs)
+
+
+def char_labels(text, spans):
+    labels = [None] * len(text)
+    for a, b, t in spans:
+        for i in range(a, b):
+            labels[i] = t
+    return labels
+
+
+def parity(ref, got):
+    exact = tp = fp = fn = same_type = 0
+    for text, ref_spans in ref.items():
+        got_spans = got[text]
+        exact += ref_spans == got_spans
+        for r, g in zip(char_labels(text, ref_spans), char_labels(text, got_spans)):
+            if r and g:
+                tp += 1
+                same_type += r == g
+            elif g:
+                fp += 1
+            elif r:
+                fn += 1
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    return {
+        "exact": round(exact / max(1, len(ref)), 4),
+        "char_f1": round(2 * precision * recall / (precision + recall) if precision + recall else 0.0, 4),
+        "type_agree": round(same_type / (tp + fn) if tp + fn else 1.0, 4),
+    }
+
+
+def rule_false_positives():
+    """{line: rule spans} for NUMERIC lines the rules would redact."""
+    found = {t: pii_rules.find_spans(pii_detect.normalize(t)[0]) for t in NUMERIC}
+    return {t: spans for t, spans in found.items() if spans}
+
+
+def cascade_check(texts, batch_size):
+    """{mode: skip rate, latency and parity} of each cascade mode against model-only spans."""
+    pii_detect.clear_cache()
+    t0 = time.perf_counter()
+    _, spans = pii_detect.predict_batch(texts, batch_size=batch_size, cascade="off")
+    reference_s = time.perf_counter() - t0
+    reference = dict(zip(texts, spans))
+    rows = {"off": {"skip_rate": 0.0, "ms": round(reference_s * 1000, 1), **parity(reference, reference)}}
+    for mode in pii_detect.CASCADES[1:]:
+        pii_detect.clear_cache()  # cold verdict cache, fresh counters
+        t0 = time.perf_counter()
+        _, spans = pii_detect.predict_batch(texts, batch_size=batch_size, cascade=mode)
+        rows[mode] = {
+            "skip_rate": pii_detect.cascade_stats()["skip_rate"],
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+            **parity(reference, dict(zip(texts, spans))),
+        }
+    pii_detect.clear_cache()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PII backends for span parity and latency")
+    parser.add_argument("--backends", default=",".join(pii_detect.BACKENDS), help="First one is the reference")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-f1", type=float, default=0.98, help="Lowest acceptable char_f1 against the reference")
+    parser.add_argument("--save", help="Write results as JSON")
+    args = parser.parse_args()
+
+    texts = corpus()
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    print(f"[bench] {len(texts)} lines, reference={backends[0]}, threads={pii_detect._THREADS or 'default'}")
+    results, reference, failed = {}, None, []
+    for backend in backends:
+        t0 = time.perf_counter()
+        pii_detect.get_model(backend)
+        load_s = time.perf_counter() - t0
+        spans = spans_of(texts, backend, args.batch_size)  # also warms up
+        reference = reference or spans
+        batched = time_backend(texts, backend, args.batch_size, args.repeat)
+        single = time_backend(texts, backend, 1, args.repeat)
+        row = {
+            "load_s": round(load_s, 2),
+            "batched_ms_per_line": round(batched * 1000 / len(texts), 2),
+            "single_ms_per_line": round(single * 1000 / len(texts), 2),
+            **parity(reference, spans),
+        }
+        results[backend] = row
+        print(f"{backend:10s} " + "  ".join(f"{k}={v}" for k, v in row.items()))
+        if row["char_f1"] < args.min_f1:
+            failed.append(backend)
+
+    cascade = cascade_check(texts, args.batch_size)
+    for mode, row in cascade.items():
+        print(f"cascade={mode:5s} " + "  ".join(f"{k}={v}" for k, v in row.items()))
+        if row["char_f1"] < args.min_f1:
+            failed.append(f"cascade={mode}")
+
+    false_positives = rule_false_positives()
+    print(f"rules      numeric_lines={len(NUMERIC)}  false_positives={len(false_positives)}")
+    for text, spans in false_positives.items():
+        print(f"  {text!r}: {spans}")
+    if false_positives:
+        failed.append("rules")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(), "lines": len(texts), "results": results, "cascade": cascade,
+                "rule_false_positives": list(false_positives),
+            }, f, indent=2)
+    if failed:
+        print(f"[bench] failed (char_f1 < {args.min_f1} or rule false positives): {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+End-to-end pipeline benchmark with regression baselines.
+
+Builds synthetic scenes with known ground truth -- an A4 scan with PII lines
+and barcodes, a photo with objects, a barcode and a name tag, and a short
+video clip -- and runs them through main.redact_image / main.redact_video,
+timing every stage on its own: OCR, box merging, PII, barcode, YOLOE,
+effects and encoding. A stage's time is summed over its calls, across
+threads, so concurrent stages can add up to more than "total". Coverage of the ground-truth regions is reported too,
+so a "faster" run that stopped redacting shows up.
+
+By default the models are replaced by deterministic stubs (stub_backends),
+so the suite needs no network or weights and measures everything around the
+models. --real uses the installed models instead.
+
+    python benchmarks/bench_pipeline.py [--repeat 5] [--save out.json] [--detect-size auto]
+    python benchmarks/bench_pipeline.py --compare baseline.json [--threshold 0.2]
+
+With --compare, stages slower than the baseline by more than --threshold
+(relative) and --min-delta-ms (absolute) are flagged and the exit status is 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+from collections import defaultdict
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+PII_LINES = [
+    "Name: Alice Smith",
+    "Email: alice.smith@example.com",
+    "Phone: +44-7700-900123",
+    "Card: 4605 1700 1002 6518",
+    "Contact Bob Jones",
+]
+PLAIN_LINES = [
+    "Invoice total due on receipt",
+    "Thank you for your order",
+    "Items shipped in two parcels",
+    "Reference code INV ALPHA",
+    "Warehouse section B aisle",
+]
+
+
+# --- synthetic scenes ---
+def draw_line(img, text, x, y, scale, thickness=2):
+    """Draw text with its baseline at y. Returns its (x0, y0, x1, y1, text) box."""
+    (w, h), base = cv2.getTextSize(text, FONT, scale, thickness)
+    cv2.putText(img, text, (x, y), FONT, scale, (20, 20, 20), thickness, cv2.LINE_AA)
+    return (x, y - h, x + w, y + base, text)
+
+
+def draw_barcode(img, x, y, w, h, seed):
+    """Code128-looking stripes with a quiet zone. Returns its (x0, y0, x1, y1)."""
+    rng = np.random.default_rng(seed)
+    cv2.rectangle(img, (x - 12, y - 12), (x + w + 12, y + h + 12), (255, 255, 255), -1)
+    cx = x
+    while cx < x + w:
+        bar = int(rng.integers(2, 7))
+        cv2.rectangle(img, (cx, y), (min(x + w, cx + bar) - 1, y + h), (0, 0, 0), -1)
+        cx += bar + int(rng.integers(2, 7))
+    return (x, y, x + w, y + h)
+
+
+def make_document(seed=0, w=2480, h=3508):
+    """A4 at 300 dpi: paper texture, 60 lines (a third with PII) and two barcodes."""
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 235, np.uint8)
+    img += rng.integers(0, 15, (h, w, 1), dtype=np.uint8)
+    lines, pii = [], []
+    y = 200
+    for i in range(60):
+        text = PII_LINES[i % len(PII_LINES)] if i % 3 == 0 else PLAIN_LINES[i % len(PLAIN_LINES)]
+        box = draw_line(img, text, 180 + int(rng.integers(0, 60)), y, 1.6, 3)
+        lines.append(box)
+        if i % 3 == 0:
+            pii.append(box[:4])
+        y += 52
+    barcodes = [draw_barcode(img, 1500, 3250, 600, 120, seed), draw_barcode(img, 300, 3300, 420, 100, seed + 1)]
+    return img, {"lines": lines, "pii": pii, "barcodes": barcodes, "objects": []}
+
+
+def make_photo(seed=0, w=1920, h=1080):
+    """Smooth gradient scene with three red objects, a barcode and a name tag."""
+    rng = np.random.default_rng(seed)
+    gx = np.linspace(60, 180, w, dtype=np.float32)
+    gy = np.linspace(0, 50, h, dtype=np.float32)[:, None]
+    base = (gx[None, :] + gy).astype(np.uint8)
+    img = cv2.merge([base, np.flipud(base), base // 2 + 40])
+    img = cv2.add(img, rng.integers(0, 8, img.shape, dtype=np.uint8))
+    objects = []
+    for i, (cx, cy) in enumerate([(400, 500), (1000, 650), (1550, 400)]):
+        ax, ay = 90 + 20 * i, 140
+        outline = cv2.ellipse2Poly((cx, cy), (ax, ay), 0, 0, 360, 5)
+        cv2.fillPoly(img, [outline], (20, 20, 230))
+        objects.append(outline)
+    cv2.rectangle(img, (1200, 850), (1800, 1010), (245, 245, 245), -1)
+    lines = [draw_line(img, PII_LINES[0], 1230, 910, 1.2), draw_line(img, PII_LINES[2], 1230, 980, 1.2)]
+    barcodes = [draw_barcode(img, 150, 880, 380, 110, seed)]
+    return img, {"lines": lines, "pii": [b[:4] for b in lines], "barcodes": barcodes, "objects": objects}
+
+
+def make_video(path, frames=120, w=640, h=360, fps=25.0):
+    """A red object crossing the frame under a static PII label."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    lines = []
+    for i in range(frames):
+        frame = np.full((h, w, 3), 90, np.uint8)
+        frame[:, :, 1] = np.linspace(60, 140, w, dtype=np.uint8)[None, :]
+        cx = 80 + int((w - 160) * i / max(1, frames - 1))
+        cv2.ellipse(frame, (cx, 200), (40, 60), 0, 0, 360, (20, 20, 230), -1)
+        cv2.rectangle(frame, (20, 20), (330, 70), (245, 245, 245), -1)
+        lines = [draw_line(frame, "Name: Alice Smith", 30, 55, 0.8)]
+        writer.write(frame)
+    writer.release()
+    return {"lines": lines, "frames": frames}
+
+
+# --- measurement ---
+class StageTimer:
+    """Wraps module functions so every call adds its duration to a stage."""
+    def __init__(self):
+        self.samples = defaultdict(float)
+
+    def wrap(self, module, name, stage):
+        fn = getattr(module, name)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples[stage] += time.perf_counter() - t0
+        setattr(module, name, timed)
+
+    def take(self):
+        out, self.samples = dict(self.samples), defaultdict(float)
+        return out
+
+
+def instrument(timer):
+    import ocr_detect
+    import pii_detect
+    import barcode_detect
+    import object_detect
+    import effects
+    import main
+
+    ocr = ocr_detect.get_ocr()
+    ocr_get = lambda: ocr  # noqa: E731
+    timer.wrap(ocr, "predict", "ocr")
+    ocr_detect.get_ocr = ocr_get
+    timer.wrap(ocr_detect, "merge_boxes_and_texts", "merge")
+    timer.wrap(pii_detect, "predict_batch", "pii")
+    timer.wrap(barcode_detect, "predict", "barcode")
+    timer.wrap(effects, "apply_effect", "effect")
+    timer.wrap(object_detect.get_model(ARGS.yoloe_model), "predict", "yoloe")  # images and video share it
+
+
+def coverage(mask, regions):
+    """Fraction of ground-truth pixels inside the redaction mask. Regions are boxes or polygons."""
+    if not len(regions):
+        return None
+    truth = np.zeros_like(mask)
+    for r in regions:
+        if len(r) == 4 and np.ndim(r) == 1:
+            x0, y0, x1, y1 = r
+            r = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+        cv2.fillPoly(truth, [np.asarray(r, dtype=np.int32).reshape(-1, 1, 2)], 255)
+    total = int(np.count_nonzero(truth))
+    return round(int(np.count_nonzero(mask[truth > 0])) / total, 4) if total else None
+
+
+def bench_image(name, img, truth, repeat):
+    import main
+    import pii_detect
+    import image_encode
+    import stub_backends
+
+    stub_backends.set_scene_lines(truth["lines"], width=img.shape[1])
+    runs = []
+    for _ in range(repeat):
+        pii_detect.clear_cache()  # every repeat pays for PII, not just the first
+        TIMER.take()
+        t0 = time.perf_counter()
+        out, meta = main.redact_image(
+            img, blur_ksize=101, merge_dist=20, yoloe_model=ARGS.yoloe_model, detect_size=ARGS.detect_size,
+        )
+        total = time.perf_counter() - t0
+        stages = TIMER.take()
+        for fmt in ("png", "jpeg"):
+            t0 = time.perf_counter()
+            image_encode.encode(out, fmt)
+            stages[f"encode_{fmt}"] = time.perf_counter() - t0
+        stages["total"] = total
+        runs.append(stages)
+
+    mask = main.mask_from_meta(img.shape[:2], meta)
+    return {
+        "size": [int(img.shape[1]), int(img.shape[0])],
+        "stages_ms": median_ms(runs),
+        "coverage": {
+            "pii": coverage(mask, truth["pii"]),
+            "barcodes": coverage(mask, truth["barcodes"]),
+            "objects": coverage(mask, truth["objects"]),
+        },
+        "counts": {k: len(meta[k]) for k in ("redactions", "barcodes", "objects")},
+        "detect_scale": meta["detect_scale"],
+    }
+
+
+def bench_video(repeat, workdir):
+    import main
+    import pii_detect
+    import stub_backends
+
+    src = os.path.join(workdir, "clip.mp4")
+    truth = make_video(src)
+    stub_backends.set_scene_lines(truth["lines"])
+    results = {}
+    for label, kwargs in (("every_frame", {"detect_every": 1}), ("keyframes_5", {"detect_every": 5})):
+        runs = []
+        for _ in range(repeat):
+            pii_detect.clear_cache()
+            TIMER.take()
+            t0 = time.perf_counter()
+            meta = main.redact_video(src, os.path.join(workdir, "out.mp4"), yolo_model=ARGS.yoloe_model,
+                                     effect="blur", blur_k=51, pipeline="all", **kwargs)
+            stages = TIMER.take()
+            stages["total"] = time.perf_counter() - t0
+            stages["encode"] = meta["stages"]["encode"]["busy_s"]
+            stages["decode"] = meta["stages"]["decode"]["busy_s"]
+            runs.append((stages, meta))
+        results[label] = {
+            "stages_ms": median_ms([s for s, _ in runs]),
+            "fps": statistics.median(m["throughput_fps"] or 0.0 for _, m in runs),
+            "frames": runs[-1][1]["frames_out"],
+            "ocr_passes": runs[-1][1]["ocr_passes"],
+            "keyframes": runs[-1][1]["keyframes"],
+        }
+    return results
+
+
+def median_ms(runs):
+    keys = sorted({k for r in runs for k in r})
+    return {k: round(statistics.median(r.get(k, 0.0) for r in runs) * 1000, 3) for k in keys}
+
+
+# --- baselines ---
+def flatten(results):
+    """{"workload/stage": value} for every timing (ms, lower is better) and fps (higher is better)."""
+    flat = {}
+    for name, res in results["workloads"].items():
+        variants = res.items() if name == "video" else [(None, res)]
+        for variant, r in variants:
+            prefix = f"{name}/{variant}" if variant else name
+            for stage, ms in r["stages_ms"].items():
+                flat[f"{prefix}/{stage}_ms"] = ms
+            if "fps" in r:
+                flat[f"{prefix}/fps"] = r["fps"]
+    return flat
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    cur, base = flatten(results), flatten(baseline)
+    regressions = []
+    print(f"\n{'metric':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for key in sorted(cur):
+        if key not in base or not base[key]:
+            continue
+        old, new = base[key], cur[key]
+        change = (new - old) / old
+        if key.endswith("/fps"):
+            worse = -change > threshold
+        else:
+            worse = change > threshold and new - old > min_delta_ms
+        flag = "  REGRESSION" if worse else ""
+        print(f"{key:<40}{old:>12.2f}{new:>12.2f}{change:>+9.0%}{flag}")
+        if worse:
+            regressions.append(key)
+    if results["mode"] != baseline.get("mode"):
+        print(f"\nwarning: comparing a {results['mode']} run against a {baseline.get('mode')} baseline")
+    return regressions
+
+
+def main():
+    global ARGS, TIMER
+    parser = argparse.ArgumentParser(description="Benchmark the redaction pipelines on synthetic scenes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--real", action="store_true", help="Use the installed models instead of stubs")
+    parser.add_argument("--yoloe-model", default="model.pt")
+    parser.add_argument("--workloads", default="document,photo,video")
+    parser.add_argument("--detect-size", default="0", help="Detection resolution for the image workloads (see detect_scale)")
+    parser.add_argument("--save", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    ARGS = parser.parse_args()
+    workloads = [w.strip() for w in ARGS.workloads.split(",") if w.strip()]
+
+    stubbed = []
+    if not ARGS.real:
+        import stub_backends
+        stubbed = stub_backends.install()
+    import main as pipeline
+    print(f"[bench] mode={'real' if ARGS.real else 'stub'} warmup: {pipeline.warmup(['all'], yoloe_model=ARGS.yoloe_model)}")
+    TIMER = StageTimer()
+    instrument(TIMER)
+
+    results = {
+        "mode": "real" if ARGS.real else "stub",
+        "stubbed": stubbed,
+        "repeat": ARGS.repeat,
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "workloads": {},
+    }
+    if "document" in workloads:
+        results["workloads"]["document"] = bench_image("document", *make_document(), ARGS.repeat)
+    if "photo" in workloads:
+        results["workloads"]["photo"] = bench_image("photo", *make_photo(), ARGS.repeat)
+    if "video" in workloads:
+        with tempfile.TemporaryDirectory() as workdir:
+            results["workloads"]["video"] = bench_video(max(1, ARGS.repeat // 2), workdir)
+
+    for name, res in results["workloads"].items():
+        for variant, r in (res.items() if name == "video" else [(None, res)]):
+            label = f"{name}/{variant}" if variant else name
+            stages = "  ".join(f"{k}={v:.1f}" for k, v in r["stages_ms"].items())
+            extra = f"  fps={r['fps']:.1f}" if "fps" in r else f"  coverage={r['coverage']}"
+            print(f"{label:<22} {stages}{extra}")
+
+    if ARGS.save:
+        with open(ARGS.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[bench] saved {ARGS.save}")
+    if ARGS.compare:
+        with open(ARGS.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, ARGS.threshold, ARGS.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {ARGS.threshold:.0%}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
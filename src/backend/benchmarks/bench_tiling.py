@@ -0,0 +1,80 @@
+"""
+Equality check and timings for tiling.blur_tiled.
+
+Blurs random polygons -- axis-aligned rectangles, rotated rectangles, concave
+stars and shapes running off the image edge -- tile by tile and compares the
+result with effects.apply_effect on the full-frame mask (main.mask_from_meta
+fills it the same way). Any differing pixel is an unblurred sliver along a
+seam, so the script exits with status 1 on the first mismatch.
+
+    python benchmarks/bench_tiling.py [--cases 40] [--size 1500] [--tile 512] [--ksize 31]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import effects  # noqa: E402
+import tiling  # noqa: E402
+
+KINDS = ("rect", "rotated", "concave", "edge")
+
+
+def random_poly(rng, kind, W, H):
+    """One int32 (N, 2) polygon of the given kind."""
+    cx, cy = rng.uniform(0.1, 0.9) * W, rng.uniform(0.1, 0.9) * H
+    if kind == "rect":
+        w, h = rng.uniform(20, W / 3), rng.uniform(10, H / 3)
+        pts = [[cx - w / 2, cy - h / 2], [cx + w / 2, cy - h / 2], [cx + w / 2, cy + h / 2], [cx - w / 2, cy + h / 2]]
+    elif kind == "rotated":
+        pts = cv2.boxPoints(((cx, cy), (rng.uniform(20, W / 3), rng.uniform(10, H / 4)), rng.uniform(-80, 80)))
+    else:
+        n = int(rng.integers(5, 12))
+        ang = np.linspace(0, 2 * np.pi, 2 * n, endpoint=False)
+        r = np.where(np.arange(2 * n) % 2, rng.uniform(0.3, 0.6), 1.0) * rng.uniform(40, min(W, H) / 3)
+        if kind == "edge":  # centred near a border so part of it lies outside the image
+            cx, cy = rng.choice([0.0, W]) + rng.uniform(-40, 40), rng.uniform(0, H)
+        pts = np.c_[cx + r * np.cos(ang), cy + r * np.sin(ang)]
+    return np.round(np.asarray(pts)).astype(np.int32)
+
+
+def full_frame(img, polys, k):
+    mask = np.zeros(img.shape[:2], np.uint8)
+    for p in polys:
+        cv2.fillPoly(mask, [p.reshape(-1, 1, 2)], 255)
+    return effects.apply_effect(img, mask, effect="blur", k=k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check blur_tiled against the full-frame blur")
+    parser.add_argument("--cases", type=int, default=40, help="Images per polygon kind")
+    parser.add_argument("--size", type=int, default=1500)
+    parser.add_argument("--tile", type=int, default=512)
+    parser.add_argument("--ksize", type=int, default=31)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    H, W = args.size, args.size * 4 // 3
+    for kind in KINDS:
+        full_s = tiled_s = 0.0
+        for case in range(args.cases):
+            img = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+            polys = [random_poly(rng, kind, W, H) for _ in range(int(rng.integers(1, 6)))]
+            t0 = time.perf_counter()
+            expected = full_frame(img, polys, args.ksize)
+            full_s += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            got = tiling.blur_tiled(img.copy(), [p.tolist() for p in polys], tile=args.tile, k=args.ksize)
+            tiled_s += time.perf_counter() - t0
+            diff = int(np.count_nonzero((got != expected).any(axis=2)))
+            if diff:
+                print(f"[bench] {kind} case {case}: {diff} px differ from the full-frame blur")
+                sys.exit(1)
+        print(f"{kind:8s} cases={args.cases}  identical  full_ms={full_s * 1000 / args.cases:.1f}  tiled_ms={tiled_s * 1000 / args.cases:.1f}")
+
+
+if __name__ == "__main__":
+    main()
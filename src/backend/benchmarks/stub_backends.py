@@ -0,0 +1,173 @@
+"""
+Deterministic stand-ins for PaddleOCR, the PII transformer, zxing-cpp and
+YOLOE, so the pipeline benchmarks run without network access or weights.
+
+They find what bench_pipeline's synthetic scenes contain with plain OpenCV:
+  - text: dark strokes (< 60 gray) joined into lines; the words come from the
+    scene's registered ground truth (OCR cannot be faked from pixels), looked
+    up in scene coordinates when the detector is given a downscaled copy
+  - barcodes: patches of strong horizontal and weak vertical gradient
+  - objects: saturated red blobs, returned as segmentation polygons
+  - PII: regex rules producing the same (start, end, label) tokens the model
+    would, so caching and span decoding run the real code
+
+install() swaps them in; everything downstream of the models is untouched.
+"""
+import re
+import sys
+import types
+from types import SimpleNamespace
+import cv2
+import numpy as np
+
+# (x0, y0, x1, y1, text) of every line drawn in the current scene, and its width
+SCENE_LINES = []
+SCENE_WIDTH = [None]
+
+
+def set_scene_lines(lines, width=None):
+    SCENE_LINES[:] = list(lines)
+    SCENE_WIDTH[0] = width
+
+
+# --- OCR ---
+def _text_boxes(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    ink = (gray < 60).astype(np.uint8) * 255
+    ink = cv2.dilate(ink, np.ones((11, 21), np.uint8))
+    contours, _ = cv2.findContours(ink, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for c in contours:
+        x, y, w, h = cv2.boundingRect(c)
+        if h >= 8 and w >= 8:
+            boxes.append((x, y, x + w, y + h))
+    return sorted(boxes, key=lambda b: (b[1], b[0]))
+
+
+def _read_text(box, f=1.0):
+    cx, cy = f * (box[0] + box[2]) / 2, f * (box[1] + box[3]) / 2
+    for x0, y0, x1, y1, text in SCENE_LINES:
+        if x0 - 12 <= cx <= x1 + 12 and y0 - 12 <= cy <= y1 + 12:
+            return text
+    return ""
+
+
+class StubOCR:
+    def predict(self, imgs):
+        single = isinstance(imgs, np.ndarray)
+        out = []
+        for img in ([imgs] if single else imgs):
+            boxes = _text_boxes(img)
+            f = SCENE_WIDTH[0] / img.shape[1] if SCENE_WIDTH[0] else 1.0
+            out.append({
+                "rec_texts": [_read_text(b, f) for b in boxes],
+                "rec_polys": [np.array([[b[0], b[1]], [b[2], b[1]], [b[2], b[3]], [b[0], b[3]]], np.int32) for b in boxes],
+            })
+        return out
+
+
+# --- PII ---
+_RULES = [
+    (re.compile(r"^[\w.+-]+@[\w-]+\.[\w.]+$"), "I-EMAIL"),
+    (re.compile(r"^\+?\d[\d-]{7,}$"), "I-TELEPHONENUM"),
+    (re.compile(r"^\d{4}$"), "I-CREDITCARDNUMBER"),  # card numbers are drawn in groups of four
+    (re.compile(r"^(Alice|Bob|Carol|Dave|Erin|Frank|Grace|Heidi|Ivan|Judy)$"), "I-GIVENNAME"),
+    (re.compile(r"^(Smith|Jones|Brown|Taylor|Wilson|Davies|Evans|Thomas)$"), "I-SURNAME"),
+]
+
+
+def _label(word):
+    word = word.strip(".,;:")
+    for pattern, label in _RULES:
+        if pattern.match(word):
+            return label
+    return "O"
+
+
+def stub_run_model(texts, batch_size=32):
+    """Drop-in for pii_detect._run_model: word-level rules instead of the transformer."""
+    import pii_detect
+    results = {}
+    for text in texts:
+        tokens, in_pii = [], False
+        for m in re.finditer(r"\S+", text):
+            label = _label(m.group())
+            if label != "O":
+                tokens.append((m.start(), m.end(), label))
+                in_pii = True
+            elif in_pii:
+                tokens.append((m.start(), m.end(), "O"))
+                in_pii = False
+        results[text] = tuple(tokens)
+        pii_detect._cache_put(text, results[text])
+    return results
+
+
+# --- barcodes ---
+def _point(x, y):
+    return SimpleNamespace(x=int(x), y=int(y))
+
+
+def stub_read_barcodes(img, *args, **kwargs):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    gx = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3))
+    gy = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3))
+    score = cv2.blur(cv2.subtract(gx, gy), (21, 21))
+    _, bars = cv2.threshold(score, 90, 255, cv2.THRESH_BINARY)
+    bars = cv2.morphologyEx(bars, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+    contours, _ = cv2.findContours(bars, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    found = []
+    for c in contours:
+        x, y, w, h = cv2.boundingRect(c)
+        if w * h < 1500:
+            continue
+        found.append(SimpleNamespace(
+            text="", format="Code128",
+            position=SimpleNamespace(
+                top_left=_point(x, y), top_right=_point(x + w, y),
+                bottom_right=_point(x + w, y + h), bottom_left=_point(x, y + h),
+            ),
+        ))
+    return found
+
+
+# --- YOLOE ---
+class _Boxes:
+    def __init__(self, xyxy):
+        self.xyxy = SimpleNamespace(cpu=lambda: SimpleNamespace(numpy=lambda: xyxy))
+
+
+class StubYOLO:
+    def _one(self, img):
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        red = cv2.inRange(hsv, (0, 150, 120), (8, 255, 255)) | cv2.inRange(hsv, (172, 150, 120), (180, 255, 255))
+        contours, _ = cv2.findContours(red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        polys = [c.reshape(-1, 2).astype(np.float32) for c in contours if cv2.contourArea(c) > 100]
+        return SimpleNamespace(masks=SimpleNamespace(xy=polys) if polys else None, boxes=_Boxes(np.empty((0, 4))))
+
+    def predict(self, source, **kwargs):
+        imgs = [source] if isinstance(source, np.ndarray) else list(source)
+        return [self._one(img) for img in imgs]
+
+
+def install():
+    """Swap the model backends for the stubs. Returns the names replaced."""
+    if "zxingcpp" not in sys.modules:
+        try:
+            import zxingcpp  # noqa: F401
+        except ImportError:
+            sys.modules["zxingcpp"] = types.ModuleType("zxingcpp")
+    import ocr_detect
+    import pii_detect
+    import barcode_detect
+    import main
+    from model_registry import MODELS
+
+    ocr, yolo = StubOCR(), StubYOLO()
+    MODELS.register("ocr", lambda name: ocr, allowed=("ppocr",))
+    MODELS.register("pii", lambda name: None)
+    MODELS.register("yoloe", lambda name: yolo)
+    pii_detect._run_model = stub_run_model
+    barcode_detect.zxingcpp = SimpleNamespace(read_barcodes=stub_read_barcodes, barcode_formats_from_str=str)
+    main.get_torch_device = lambda: "cpu"  # torch itself may not be installed
+    return ["paddleocr", "pii", "zxingcpp", "yoloe"]
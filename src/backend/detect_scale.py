@@ -0,0 +1,132 @@
+"""
+Detection resolution, decoupled from output resolution.
+
+Each detector ("ocr", "object", "barcode") can run on a downscaled copy of
+the image; its polygons are mapped back to full-resolution coordinates and
+grown by a safety margin, and the mask and blur are still computed at full
+size. Sizes are the longest side in px:
+
+    0            native resolution (the default)
+    1600         downscale to 1600 px if larger
+    "auto"       pick from image size and content density (see auto_size)
+
+A spec is an int or "auto" for every pipeline, or "ocr=auto,object=1280" /
+{"ocr": "auto", "object": 1280} per pipeline (REDACT_DETECT_SIZE).
+
+The margin added to every polygon is `margin` px plus one source pixel per
+detection pixel (1 / scale), which covers the rounding of coordinates made
+at the lower resolution (`margin` defaults to REDACT_DETECT_MARGIN).
+"""
+import os
+import math
+import cv2
+import numpy as np
+
+SIZE = os.getenv("REDACT_DETECT_SIZE", "0")
+MARGIN = int(os.getenv("REDACT_DETECT_MARGIN", "4"))
+PIPELINES = ("ocr", "object", "barcode")
+
+
+def parse(spec) -> dict:
+    """{pipeline: size or "auto"} from an int, "auto", "ocr=1600,object=auto" or a dict (None: SIZE)."""
+    spec = SIZE if spec is None else spec
+    if spec == "":
+        return dict.fromkeys(PIPELINES, 0)
+    if isinstance(spec, dict):
+        sizes = dict.fromkeys(PIPELINES, 0)
+        sizes.update(spec)
+    elif isinstance(spec, int) or "=" not in str(spec):
+        sizes = dict.fromkeys(PIPELINES, spec)
+    else:
+        sizes = dict.fromkeys(PIPELINES, 0)
+        for part in str(spec).split(","):
+            name, _, value = part.partition("=")
+            sizes[name.strip()] = value.strip()
+    out = {}
+    for name, value in sizes.items():
+        if name not in PIPELINES:
+            raise ValueError(f"Unknown detection pipeline {name!r} (expected one of {', '.join(PIPELINES)})")
+        if value != "auto":
+            value = int(value)
+            if value < 0:
+                raise ValueError(f"Detection size for {name} must be >= 0 or 'auto'")
+        out[name] = value
+    return out
+
+
+def edge_density(img) -> float:
+    """Share of edge pixels on a 512 px thumbnail; dense small print scores high, photos low."""
+    thumb = shrink(img, 512 / max(img.shape[:2]))
+    gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY) if thumb.ndim == 3 else thumb
+    return float(np.count_nonzero(cv2.Canny(gray, 80, 160))) / gray.size
+
+
+def auto_size(pipeline: str, density: float) -> int:
+    """Size for `pipeline` given the image's edge density."""
+    if pipeline == "object":
+        return 1280  # YOLOE predicts at 640 px; twice that keeps its masks sharp when scaled back
+    if pipeline == "barcode":
+        return 0  # small symbols only resolve at native resolution (see barcode_detect)
+    # Text must stay legible: the denser the page, the smaller its print
+    if density < 0.02:
+        return 1280
+    if density < 0.06:
+        return 1920
+    if density < 0.12:
+        return 2560
+    return 0
+
+
+def plan(img, spec) -> dict:
+    """{pipeline: scale <= 1.0} for img; density is measured only if some pipeline is "auto"."""
+    sizes = parse(spec)
+    h, w = img.shape[:2]
+    density = edge_density(img) if "auto" in sizes.values() else None
+    scales = {}
+    for name, size in sizes.items():
+        if size == "auto":
+            size = auto_size(name, density)
+        scales[name] = min(1.0, size / max(h, w)) if size else 1.0
+    return scales
+
+
+def shrink(img, scale: float):
+    """img resized by scale, or img itself at 1.0."""
+    if scale >= 1.0:
+        return img
+    h, w = img.shape[:2]
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    n = int(1.0 / scale)
+    if n > 1:
+        # INTER_AREA is several times faster at an integer factor; the rest is above 1/2 and linear is enough
+        img = cv2.resize(img, (w // n, h // n), interpolation=cv2.INTER_AREA)
+    return cv2.resize(img, size, interpolation=cv2.INTER_LINEAR)
+
+
+def _grow(pts, margin: int, shape_hw):
+    """pts (N, 2) float grown by margin px: the outer contour of the dilated polygon, clipped to the image."""
+    H, W = shape_hw
+    x0, y0 = np.floor(pts.min(axis=0)).astype(int) - margin - 1
+    x1, y1 = np.ceil(pts.max(axis=0)).astype(int) + margin + 2
+    local = np.zeros((y1 - y0, x1 - x0), np.uint8)
+    cv2.fillPoly(local, [np.round(pts - (x0, y0)).astype(np.int32).reshape(-1, 1, 2)], 255)
+    local = cv2.dilate(local, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * margin + 1, 2 * margin + 1)))
+    contours, _ = cv2.findContours(local, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    outer = max(contours, key=cv2.contourArea)
+    outer = cv2.approxPolyDP(outer, 1.0, True).reshape(-1, 2) + (x0, y0)
+    return np.clip(outer, 0, (W - 1, H - 1)).astype(np.int32)
+
+
+def restore(polys, scale: float, shape_hw, margin: int = None):
+    """
+    Polygons found at `scale` mapped to full-resolution coords and grown; unchanged at 1.0.
+    One output per input, empty ones included, so OCR texts stay paired with their boxes.
+    """
+    if scale >= 1.0:
+        return [np.asarray(p, dtype=np.int32).reshape(-1, 2) for p in polys]
+    grow = (MARGIN if margin is None else margin) + math.ceil(1.0 / scale)
+    return [
+        _grow(np.asarray(p, dtype=np.float32).reshape(-1, 2) / scale, grow, shape_hw)
+        if len(p) else np.asarray(p, dtype=np.int32).reshape(-1, 2)
+        for p in polys
+    ]
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+
+def mask_regions(mask: np.ndarray, pad: int = 0):
+    """
+    Bounding boxes (x0, y0, x1, y1) of the connected regions of mask, grown by
+    `pad` and clipped to the image. Boxes whose padded areas touch are merged,
+    so redacting one box in place never changes the pixels another box reads.
+    Returns a list of (inner, outer) box pairs: `inner` covers the mask pixels,
+    `outer` is the padded crop the effect has to read.
+    """
+    H, W = mask.shape[:2]
+    # Outer contours are much cheaper than a full connected-components pass,
+    # and their bounding rects still cover every mask pixel (holes included)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for c in contours:
+        x, y, w, h = cv2.boundingRect(c)
+        boxes.append([x, y, x + w, y + h])
+    def outer(b):
+        return (max(0, b[0] - pad), max(0, b[1] - pad), min(W, b[2] + pad), min(H, b[3] + pad))
+    def touches(a, b):
+        return not (a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1])
+
+    merged = True
+    while merged and len(boxes) > 1:
+        merged = False
+        out = []
+        for b in boxes:
+            for m in out:
+                if touches(outer(m), outer(b)):
+                    m[0], m[1] = min(m[0], b[0]), min(m[1], b[1])
+                    m[2], m[3] = max(m[2], b[2]), max(m[3], b[3])
+                    merged = True
+                    break
+            else:
+                out.append(b)
+        boxes = out
+    return [(tuple(b), outer(b)) for b in boxes]
+
+
+def _nearest_map(n_src: int, n_dst: int) -> np.ndarray:
+    """Source index of each of n_dst samples in cv2.resize(..., INTER_NEAREST) from n_src."""
+    ramp = np.arange(n_src, dtype=np.int32)[None, :]
+    return cv2.resize(ramp, (n_dst, 1), interpolation=cv2.INTER_NEAREST)[0].astype(np.intp)
+
+
+def apply_effect(frame: np.ndarray,
+                 mask: np.ndarray,
+                 effect: str = "blur",
+                 k: int = 201,
+                 sigma: float = 0.0,
+                 dilate: int = 0,
+                 pixel_div: int = 24,
+                 inplace: bool = False):
+    """
+    Apply "blur" | "pixelate" | "black" where mask > 0, working only on padded
+    crops around the masked regions. Inside the mask the result matches running
+    the effect on the full frame. `dilate` grows the mask by a square kernel first.
+    """
+    out = frame if inplace else frame.copy()
+    k = k if k % 2 == 1 else k + 1
+    grow = dilate // 2 if dilate > 1 else 0
+    pad = grow + (k // 2 if effect == "blur" else 0)
+
+    small = None
+    if effect == "pixelate":
+        # The block grid is global; downscaling the whole frame is cheap (1/div^2 pixels)
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (max(1, w // pixel_div), max(1, h // pixel_div)), interpolation=cv2.INTER_LINEAR)
+        # Block of every row/column, taken from OpenCV itself: resizing an index ramp with
+        # INTER_NEAREST gives exactly the source pixels a full-frame upscale would pick
+        xmap = _nearest_map(small.shape[1], w)
+        ymap = _nearest_map(small.shape[0], h)
+
+    for (ix0, iy0, ix1, iy1), (ox0, oy0, ox1, oy1) in mask_regions(mask, pad):
+        # Region the mask can reach after dilation
+        rx0, ry0 = max(ox0, ix0 - grow), max(oy0, iy0 - grow)
+        rx1, ry1 = min(ox1, ix1 + grow), min(oy1, iy1 + grow)
+        m = mask[ry0:ry1, rx0:rx1]
+        if grow:
+            # Dilate with enough context that the result matches a full-frame dilate
+            cx0, cy0 = max(0, rx0 - grow), max(0, ry0 - grow)
+            ctx = mask[cy0:min(mask.shape[0], ry1 + grow), cx0:min(mask.shape[1], rx1 + grow)]
+            ctx = cv2.dilate(ctx, np.ones((dilate, dilate), np.uint8), 1)
+            m = ctx[ry0 - cy0:ry1 - cy0, rx0 - cx0:rx1 - cx0]
+        sel = m > 0
+        dst = out[ry0:ry1, rx0:rx1]
+
+        if effect == "blur":
+            crop = cv2.GaussianBlur(out[oy0:oy1, ox0:ox1], (k, k), sigma)
+            mod = crop[ry0 - oy0:ry1 - oy0, rx0 - ox0:rx1 - ox0]
+        elif effect == "pixelate":
+            mod = small[ymap[ry0:ry1, None], xmap[None, rx0:rx1]]
+        else:  # black box
+            dst[sel] = 0
+            continue
+        dst[sel] = mod[sel]
+    return out
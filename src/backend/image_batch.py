@@ -0,0 +1,122 @@
+"""
+Helpers for the /redact/batch endpoint.
+
+Inputs are multipart parts, and any part that is a zip archive is expanded
+into its image entries (archive order). Entries are read lazily, a chunk at a
+time, so a large upload never sits decoded in memory all at once. They read
+from copies of the uploads (spooled to disk past REDACT_BATCH_SPOOL_BYTES),
+since FastAPI closes the uploads while the response is still streaming.
+
+Results stream back in input order as NDJSON lines or as a zip archive that is
+written entry by entry (no seeking), while later chunks are still running.
+"""
+import os
+import shutil
+import asyncio
+import tempfile
+import zipfile
+from starlette.concurrency import run_in_threadpool
+
+SPOOL_BYTES = int(os.getenv("REDACT_BATCH_SPOOL_BYTES", str(16 << 20)))  # larger copies go to disk
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+def is_zip(upload) -> bool:
+    name = (upload.filename or "").lower()
+    return name.endswith(".zip") or upload.content_type in ("application/zip", "application/x-zip-compressed")
+
+
+def _own_copy(upload):
+    """Copy of upload's bytes in a temp file this module owns (FastAPI closes uploads when the handler returns)."""
+    tmp = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    upload.file.seek(0)
+    shutil.copyfileobj(upload.file, tmp)
+    tmp.seek(0)
+    return tmp
+
+
+def expand_inputs(uploads):
+    """
+    ([(filename, read)] for every image, close) where read() returns its bytes
+    (blocking). The entries read from copies of the uploads, so they outlive the
+    request handler; close() releases the copies and archives and must be called
+    once the entries are done with.
+    """
+    handles, entries = [], []
+
+    def close():
+        while handles:
+            handles.pop().close()
+
+    try:
+        for upload in uploads:
+            tmp = _own_copy(upload)
+            handles.append(tmp)
+            if is_zip(upload):
+                archive = zipfile.ZipFile(tmp)
+                handles.append(archive)
+                for info in archive.infolist():
+                    if info.is_dir() or os.path.splitext(info.filename)[1].lower() not in IMAGE_EXTS:
+                        continue
+                    entries.append((info.filename, lambda a=archive, i=info: a.read(i)))
+            else:
+                entries.append((upload.filename or "image", lambda f=tmp: (f.seek(0), f.read())[1]))
+    except Exception:
+        close()
+        raise
+    return entries, close
+
+
+async def ordered_chunks(entries, chunk_size: int, process, window: int = 1):
+    """
+    Run process(first_index, chunk) over consecutive chunks with up to `window`
+    chunks in flight, yielding each chunk's results strictly in input order.
+    """
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+    pending = []
+    try:
+        for n, chunk in enumerate(chunks):
+            pending.append(asyncio.ensure_future(process(n * chunk_size, chunk)))
+            if len(pending) >= max(1, window):
+                yield await pending.pop(0)
+        while pending:
+            yield await pending.pop(0)
+    finally:
+        for task in pending:  # client went away
+            task.cancel()
+
+
+async def read_entries(chunk):
+    return await run_in_threadpool(lambda: [read() for _, read in chunk])
+
+
+class _Sink:
+    """Write-only file object for zipfile; the bytes are drained after each entry."""
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+class ZipStream:
+    """Build a zip archive incrementally: add() and close() return the bytes to send."""
+    def __init__(self):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_STORED)
+
+    def add(self, name: str, data: bytes, compress: bool = False) -> bytes:
+        self._zip.writestr(name, data, compress_type=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
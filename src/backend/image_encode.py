@@ -0,0 +1,59 @@
+"""
+Output image encoding for the API: format negotiation and cv2.imencode
+settings. encode() hands back a memoryview over OpenCV's own output buffer,
+so the response body is sent without copying it into bytes/BytesIO first.
+"""
+import cv2
+
+FORMATS = {
+    "png": (".png", "image/png"),
+    "jpeg": (".jpg", "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+}
+_BY_MEDIA_TYPE = {media_type: fmt for fmt, (_, media_type) in FORMATS.items()}
+_BY_MEDIA_TYPE["image/jpg"] = "jpeg"
+
+
+def negotiate(accept: str = None, requested: str = None, default: str = "png") -> str:
+    """
+    Output format from an explicit `requested` name ("png", "jpeg"/"jpg",
+    "webp"), else the best supported type in the Accept header, else default.
+    """
+    if requested:
+        requested = requested.lower()
+        return "jpeg" if requested == "jpg" else requested
+    best, best_q = default, 0.0
+    for i, part in enumerate((accept or "").split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        media_type, q = fields[0].lower(), 1.0
+        for f in fields[1:]:
+            if f.startswith("q="):
+                try:
+                    q = float(f[2:])
+                except ValueError:
+                    q = 0.0
+        fmt = _BY_MEDIA_TYPE.get(media_type)
+        if fmt is None and media_type in ("image/*", "*/*"):
+            fmt = default
+        # Highest q wins; on a tie the earlier entry does
+        if fmt is not None and q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def encode(img, fmt: str = "png", quality: int = 90, compression: int = None):
+    """
+    Encode img as fmt. quality (1-100) applies to JPEG/WebP, compression
+    (0-9, None = OpenCV's default) to PNG. Returns (memoryview, media_type).
+    """
+    ext, media_type = FORMATS[fmt]
+    if fmt == "jpeg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    elif fmt == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(compression)] if compression is not None else []
+    ok, enc = cv2.imencode(ext, img, params)
+    if not ok:
+        raise ValueError(f"Failed to encode image as {fmt}")
+    return enc.reshape(-1).data, media_type
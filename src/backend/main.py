@@ -1,18 +1,24 @@
 import os
 import sys
+import time
 import argparse
 import cv2
-import torch
 import numpy as np
 import ocr_detect
 import pii_detect
 import barcode_detect
 import object_detect
 import video_object_detect
-from ultralytics import YOLOE
+import effects
+import tiling
+import metrics
+import detect_scale
+import video_pipeline
+from model_registry import MODELS
 from functools import lru_cache
 
 def get_torch_device():
+    import torch
     if torch.cuda.is_available():
         # e.g., 'cuda:0' for first GPU
         return "cuda:0"
@@ -20,11 +26,19 @@ def get_torch_device():
         return "mps"
     return "cpu"
 
-@lru_cache(maxsize=1)
-def _get_yolo_video(model_path: str = "model.pt"):
-    # Lazy load; used only for video processing
-    from ultralytics import YOLO
-    return YOLOE(model_path, task="segment")
+def warmup(pipelines=("ocr",), yoloe_model: str = "model.pt") -> dict:
+    """
+    Load only the models the given pipelines need ('ocr', 'object', 'video', 'all').
+    Returns {model_name: load_seconds} for a startup-time report.
+    """
+    specs = {}
+    for p in pipelines:
+        if p in ("ocr", "all"):
+            specs[("ocr", "ppocr")] = None
+            specs[("pii", pii_detect.BACKEND)] = None
+        if p in ("object", "video", "all"):
+            specs[("yoloe", yoloe_model)] = None  # one copy for images and video
+    return MODELS.preload(specs)
 
 def redact_video(
     src_path: str,
@@ -33,55 +47,102 @@ def redact_video(
     effect: str = "blur",
     blur_k: int = 201,
     vid_stride: int = 1,
+    detect_every: int = 1,
+    track_margin: int = 8,
+    batch_size: int = 4,
+    effect_workers: int = 2,
+    progress=None,
+    cancel=None,
+    pipeline: str = "object",
+    merge_dist: int = 12,
+    ocr_threshold: float = 0.03,
+    start_frame: int = 0,
+    end_frame: int = None,
 ) -> dict:
     """
     Process a video using the segmentation/detection model and redact per-frame.
     Uses video_obj.build_mask_from_results and video_obj.apply_effect.
-    Returns metadata dict.
+    With detect_every=N > 1 the model runs on every Nth frame only; masks are
+    carried to the frames in between by optical flow and grown by track_margin
+    px. Every frame is still written.
+    Decode, batched inference, effects and encoding run as overlapping stages
+    (see video_pipeline); the metadata includes per-stage throughput.
+    progress(frames_done, frames_total) and cancel() -> bool are optional hooks
+    for long-running jobs; cancelling raises video_pipeline.VideoCancelled.
+    Pipelines: 'object' (YOLOE), 'ocr' (text PII + barcodes) or 'all'. Text is
+    OCR'd only on frames whose change score exceeds ocr_threshold; the mask is
+    reused in between and the metadata reports how many frames triggered OCR.
+    start_frame/end_frame redact only that range of source frames (one segment
+    of a video split across workers, see video_segments).
+    Returns metadata dict; "timings" has the setup stages (probe, model load,
+    writer) and the pipeline stages' busy seconds.
     """
-    cap = cv2.VideoCapture(src_path)
+    t_start = time.perf_counter()
+    timings = metrics.StageTimings()
+    cap = timings.call("probe", cv2.VideoCapture, src_path)
     if not cap.isOpened():
         raise ValueError(f"Cannot open video: {src_path}")
     fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
     W = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     H = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    stride = max(1, int(vid_stride))
+    n_frames = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))  # container estimate; 0 if unknown
+    if end_frame is not None and n_frames:
+        n_frames = min(n_frames, end_frame)
+    total = (max(0, n_frames - start_frame) + stride - 1) // stride
     cap.release()
 
-    model = _get_yolo_video(yolo_model)
-    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (W, H))
-    DEVICE = get_torch_device()
-
-    frames_in, frames_out = 0, 0
-    for r in model.predict(
-        source=src_path,
-        stream=True,
-        device=DEVICE,
-        imgsz=640,
-        save=False,
-        save_txt=False,
-        save_crop=False,
-        retina_masks=False,
-        verbose=False,
-        vid_stride=max(1, int(vid_stride)),
-    ):
-        frames_in += 1
-        frame = r.orig_img.copy()
-        mask = video_object_detect.build_mask_from_results(r, (frame.shape[0], frame.shape[1]))
-        if mask.any():
-            frame = video_object_detect.apply_effect(frame, mask, effect=effect, k=blur_k)
-        writer.write(frame)
-        frames_out += 1
-
-    writer.release()
+    if pipeline not in ("object", "ocr", "all"):
+        raise ValueError(f"Unknown pipeline: {pipeline}")
+    with timings.stage("model"):
+        model = object_detect.get_model(yolo_model) if pipeline in ("object", "all") else None
+        DEVICE = get_torch_device()
+    writer = timings.call("writer", cv2.VideoWriter, out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (W, H))
+
+    try:
+        stats = video_pipeline.run(
+            model,
+            src_path,
+            writer,
+            device=DEVICE,
+            effect=effect,
+            blur_k=blur_k,
+            vid_stride=vid_stride,
+            detect_every=detect_every,
+            track_margin=track_margin,
+            batch_size=batch_size,
+            effect_workers=effect_workers,
+            progress=(lambda n: progress(n, total)) if progress is not None else None,
+            cancel=cancel,
+            text=pipeline in ("ocr", "all"),
+            merge_dist=merge_dist,
+            ocr_threshold=ocr_threshold,
+            start_frame=start_frame,
+            end_frame=end_frame,
+        )
+    finally:
+        writer.release()
+    for stage, s in stats["stages"].items():
+        timings.add(stage, s["busy_s"])
+    timings.add("total", time.perf_counter() - t_start)
     return {
         "width": W,
         "height": H,
         "fps": float(fps),
-        "frames_in": frames_in,
-        "frames_out": frames_out,
+        "frames_in": stats["frames_in"],
+        "frames_out": stats["frames_out"],
+        "keyframes": stats["keyframes"],
+        "ocr_passes": stats["ocr_passes"],
+        "pipeline": pipeline,
+        "detect_every": max(1, int(detect_every)),
         "output": out_path,
         "effect": effect,
         "model": yolo_model,
+        "throughput_fps": stats["fps"],
+        "wall_s": stats["wall_s"],
+        "stages": stats["stages"],
+        "queues": stats["queues"],
+        "timings": timings.as_dict(),
     }
 
 
@@ -90,58 +151,329 @@ def redact_image(img: np.ndarray,
                  blur_sigma: float = 0.0,
                  merge_dist: int = 12,
                  pipeline: str = "all",
-                 yoloe_model: str = "model.pt"):
+                 yoloe_model: str = "model.pt",
+                 inplace: bool = False,
+                 tile: int = 0,
+                 tile_overlap: int = 256,
+                 detect_size=None,
+                 detect_margin: int = None):
     """
     Pipelines:
       - 'ocr'   : OCR + PII + barcodes
       - 'object': Object segmentation/detection only
       - 'all'   : union of OCR+PII+barcodes and objects
+    With inplace=True the blur is written into `img` instead of a copy.
+    With tile > 0, images larger than tile px on a side go through
+    redact_image_tiled.
+    detect_size runs the detectors on a downscaled copy ("auto", px, or per
+    pipeline, see detect_scale); polygons come back at full resolution grown
+    by detect_margin px, and the blur is applied at full resolution. Tiled
+    images are detected at full resolution.
     """
     if img is None:
         raise ValueError("img is None")
+    if tile and max(img.shape[:2]) > tile:
+        return redact_image_tiled(
+            img, tile=tile, overlap=tile_overlap, blur_ksize=blur_ksize, blur_sigma=blur_sigma,
+            merge_dist=merge_dist, pipeline=pipeline, yoloe_model=yoloe_model, inplace=inplace,
+        )
 
-    mask = np.zeros(img.shape[:2], dtype=np.uint8)
-    redacted_items, barcode_items, object_items = [], [], []
+    t_start = time.perf_counter()
+    timings = metrics.StageTimings()
+    timed = timings.call
+    scales = timed("scale", detect_scale.plan, img, detect_size)
 
-    if pipeline in ("ocr", "all"):
-        rec_texts, rec_polys = ocr_detect.predict(img, merge_dist=merge_dist)
-        for text, box in zip(rec_texts, rec_polys):
-            redacted_text = pii_detect.predict(text)
-            if redacted_text != text:
-                pts = np.asarray(box, dtype=np.int32).reshape(-1, 1, 2)
-                cv2.fillPoly(mask, [pts], 255)
-                redacted_items.append({"type": "text", "text": text, "poly": np.asarray(box).reshape(-1, 2).tolist()})
-        # barcodes
-        barcode_boxes = barcode_detect.predict(img)
-        for pts in barcode_boxes:
-            cv2.fillPoly(mask, [pts.reshape(-1, 1, 2)], 255)
-            barcode_items.append({"type": "barcode", "poly": pts.reshape(-1, 2).tolist()})
+    def detect(name, fn, **kwargs):
+        # Detector on a downscaled copy; polygons mapped back to img and grown by the margin
+        s = scales[name]
+        small = timed("resize", detect_scale.shrink, img, s)
+        found = timed(name, fn, small, **kwargs)
+        texts, polys = found if name == "ocr" else (None, found)
+        polys = timed("upscale", detect_scale.restore, polys, s, img.shape[:2], detect_margin)
+        return polys if texts is None else (texts, polys)
 
+    def text_items():
+        # PII starts as soon as OCR returns, while the other detectors keep running
+        rec_texts, rec_polys = detect(
+            "ocr", ocr_detect.predict, merge_dist=merge_dist and max(1, round(merge_dist * scales["ocr"])), timings=timings,
+        )
+        redacted_texts, _ = timed("pii", pii_detect.predict_batch, rec_texts)  # one batched pass for all lines
+        return [
+            {"type": "text", "text": text, "poly": np.asarray(box).reshape(-1, 2).tolist()}
+            for text, redacted_text, box in zip(rec_texts, redacted_texts, rec_polys)
+            if redacted_text != text
+        ]
+
+    def barcode_items():
+        return [
+            {"type": "barcode", "poly": pts.reshape(-1, 2).tolist()}
+            for pts in detect("barcode", barcode_detect.predict)
+        ]
+
+    def object_items():
+        try:
+            obj_polys = detect("object", object_detect.predict, model_path=yoloe_model)
+        except Exception as e:
+            print(f"[object_detect] skipped: {e}")
+            return []
+        return [{"type": "object", "poly": poly.reshape(-1, 2).tolist()} for poly in obj_polys]
+
+    # The detectors are independent and spend their time in native code that
+    # releases the GIL, so they run side by side on a shared thread pool
+    pool = _detector_executor()
+    futures = {}
+    if pipeline in ("ocr", "all"):
+        futures["redactions"] = pool.submit(text_items)
+        futures["barcodes"] = pool.submit(barcode_items)
     if pipeline in ("object", "all"):
+        futures["objects"] = pool.submit(object_items)
+    items = {key: [] for key in ("redactions", "barcodes", "objects")}
+    items.update({key: f.result() for key, f in futures.items()})
+
+    meta = {
+        "pipeline": pipeline,
+        "mask_applied": False,
+        "redactions": items["redactions"],
+        "barcodes": items["barcodes"],
+        "objects": items["objects"],
+        "detect_scale": {name: round(scales[name], 4) for name in scales},
+    }
+    timings.add("detect", time.perf_counter() - t_start)
+
+    # apply Gaussian blur only inside masked regions (padded crops, not the full frame)
+    with timings.stage("effect"):
+        mask = mask_from_meta(img.shape[:2], meta)
+        out = effects.apply_effect(img, mask, effect="blur", k=blur_ksize, sigma=blur_sigma, inplace=inplace)
+    timings.add("total", time.perf_counter() - t_start)
+
+    meta["mask_applied"] = bool(np.any(mask))
+    meta["timings"] = timings.as_dict()
+    return out, meta
+
+def redact_image_tiled(img: np.ndarray,
+                       tile: int = 2048,
+                       overlap: int = 256,
+                       blur_ksize: int = 201,
+                       blur_sigma: float = 0.0,
+                       merge_dist: int = 12,
+                       pipeline: str = "all",
+                       yoloe_model: str = "model.pt",
+                       inplace: bool = False):
+    """
+    redact_image for very large images (scans, panoramas). The detectors run on
+    overlapping tile x tile crops at full resolution; polygons are mapped back
+    to image coordinates and duplicates along the seams merged (see tiling).
+    PII runs once over the merged text lines, and the blur is applied tile by
+    tile, so beyond the image itself memory is bounded by the tile size.
+    `img` may be an np.memmap (see tiling.open_image). Returns (out, meta).
+    """
+    if img is None:
+        raise ValueError("img is None")
+
+    if tile <= overlap:
+        raise ValueError("tile must be larger than overlap")
+
+    t_start = time.perf_counter()
+    H, W = img.shape[:2]
+    tiles = tiling.tile_grid(H, W, tile, overlap)
+    timings = metrics.StageTimings()  # per-tile stages add up
+    timed = timings.call
+
+    def objects(crop):
         try:
-            obj_polys = object_detect.predict(img, model_path=yoloe_model)
-            for poly in obj_polys:
-                cv2.fillPoly(mask, [poly.reshape(-1, 1, 2)], 255)
-                object_items.append({"type": "object", "poly": poly.reshape(-1, 2).tolist()})
+            return timed("object", object_detect.predict, crop, model_path=yoloe_model)
         except Exception as e:
             print(f"[object_detect] skipped: {e}")
+            return []
+
+    found = {key: ([], []) for key in ("text", "barcode", "object")}  # (polys, tile ids)
+    texts = []
+    pool = _detector_executor()
+    for t, (x0, y0, x1, y1) in enumerate(tiles):
+        crop = np.ascontiguousarray(img[y0:y1, x0:x1])
+        futures = {}
+        if pipeline in ("ocr", "all"):
+            futures["text"] = pool.submit(timed, "ocr", ocr_detect.predict, crop, merge_dist=merge_dist, timings=timings)
+            futures["barcode"] = pool.submit(timed, "barcode", barcode_detect.predict, crop)
+        if pipeline in ("object", "all"):
+            futures["object"] = pool.submit(objects, crop)
+        for key, f in futures.items():
+            polys = f.result()
+            if key == "text":
+                tile_texts, polys = polys
+                texts.extend(tile_texts)
+            for poly in polys:
+                found[key][0].append(np.asarray(poly, dtype=np.int32).reshape(-1, 2) + (x0, y0))
+                found[key][1].append(t)
+        crop = None
 
-    # apply Gaussian blur only inside masked regions
-    out = img.copy()
-    if np.any(mask):
-        ks = blur_ksize if blur_ksize % 2 == 1 else blur_ksize + 1
-        blurred = cv2.GaussianBlur(out, (ks, ks), blur_sigma)
-        out[mask == 255] = blurred[mask == 255]
+    merged = {}
+    with timings.stage("seams"):
+        for key, (polys, tile_ids) in found.items():
+            merged[key] = tiling.merge_seams(polys, tile_ids, tiles, texts if key == "text" else None)
+    rec_polys, rec_texts = merged["text"]
+    redacted_texts, _ = timed("pii", pii_detect.predict_batch, rec_texts)
 
     meta = {
         "pipeline": pipeline,
-        "mask_applied": bool(np.any(mask)),
-        "redactions": redacted_items,
-        "barcodes": barcode_items,
-        "objects": object_items,
+        "mask_applied": False,
+        "redactions": [
+            {"type": "text", "text": text, "poly": np.asarray(box).reshape(-1, 2).tolist()}
+            for text, redacted_text, box in zip(rec_texts, redacted_texts, rec_polys)
+            if redacted_text != text
+        ],
+        "barcodes": [{"type": "barcode", "poly": p.reshape(-1, 2).tolist()} for p in merged["barcode"][0]],
+        "objects": [{"type": "object", "poly": p.reshape(-1, 2).tolist()} for p in merged["object"][0]],
+        "tiles": len(tiles),
+        "tile": tile,
     }
+    timings.add("detect", time.perf_counter() - t_start)
+
+    with timings.stage("effect"):
+        polys = [item["poly"] for key in ("redactions", "barcodes", "objects") for item in meta[key]]
+        out = img if inplace else img.copy()
+        tiling.blur_tiled(out, polys, tile=tile, k=blur_ksize, sigma=blur_sigma)
+    timings.add("total", time.perf_counter() - t_start)
+
+    meta["mask_applied"] = bool(polys)
+    meta["timings"] = timings.as_dict()
     return out, meta
 
+def redact_images(imgs,
+                  blur_ksize: int = 201,
+                  blur_sigma: float = 0.0,
+                  merge_dist: int = 12,
+                  pipeline: str = "all",
+                  yoloe_model: str = "model.pt",
+                  inplace: bool = False,
+                  detect_size=None,
+                  detect_margin: int = None):
+    """
+    redact_image for a list of images. OCR, PII and YOLOE each run once over the
+    whole list (one batched call per model) instead of once per image; barcodes
+    are still scanned image by image alongside them. detect_size is resolved
+    per image, as in redact_image.
+    Returns [(out, meta), ...] in input order. Detection timings in each meta
+    are for the whole batch; "effect" is per image.
+    """
+    imgs = list(imgs)
+    if any(img is None for img in imgs):
+        raise ValueError("img is None")
+    if not imgs:
+        return []
+
+    t_start = time.perf_counter()
+    timings = metrics.StageTimings()
+    timed = timings.call
+    scales = timed("scale", lambda: [detect_scale.plan(img, detect_size) for img in imgs])
+
+    def shrunk(name):
+        return timed("resize", lambda: [detect_scale.shrink(img, s[name]) for img, s in zip(imgs, scales)])
+
+    def restored(name, batch_polys):
+        return timed("upscale", lambda: [
+            detect_scale.restore(polys, s[name], img.shape[:2], detect_margin)
+            for img, s, polys in zip(imgs, scales, batch_polys)
+        ])
+
+    def text_items():
+        dists = [merge_dist and max(1, round(merge_dist * s["ocr"])) for s in scales]
+        ocr_results = timed("ocr", ocr_detect.predict_batch, shrunk("ocr"), merge_dist=dists, timings=timings)
+        ocr_polys = restored("ocr", [rec_polys for _, rec_polys in ocr_results])
+        # Every line of every image goes through the PII model together
+        lines = [text for rec_texts, _ in ocr_results for text in rec_texts]
+        redacted_lines, _ = timed("pii", pii_detect.predict_batch, lines)
+        per_image, pos = [], 0
+        for (rec_texts, _), rec_polys in zip(ocr_results, ocr_polys):
+            redacted_texts = redacted_lines[pos:pos + len(rec_texts)]
+            pos += len(rec_texts)
+            per_image.append([
+                {"type": "text", "text": text, "poly": np.asarray(box).reshape(-1, 2).tolist()}
+                for text, redacted_text, box in zip(rec_texts, redacted_texts, rec_polys)
+                if redacted_text != text
+            ])
+        return per_image
+
+    def barcode_items():
+        smalls = shrunk("barcode")
+        found = timed("barcode", lambda: [barcode_detect.predict(small) for small in smalls])
+        return [
+            [{"type": "barcode", "poly": pts.reshape(-1, 2).tolist()} for pts in polys]
+            for polys in restored("barcode", found)
+        ]
+
+    def object_items():
+        try:
+            batch_polys = timed("object", object_detect.predict_batch, shrunk("object"), model_path=yoloe_model)
+        except Exception as e:
+            print(f"[object_detect] skipped: {e}")
+            return [[] for _ in imgs]
+        batch_polys = restored("object", batch_polys)
+        return [[{"type": "object", "poly": poly.reshape(-1, 2).tolist()} for poly in polys] for polys in batch_polys]
+
+    pool = _detector_executor()
+    futures = {}
+    if pipeline in ("ocr", "all"):
+        futures["redactions"] = pool.submit(text_items)
+        futures["barcodes"] = pool.submit(barcode_items)
+    if pipeline in ("object", "all"):
+        futures["objects"] = pool.submit(object_items)
+    items = {key: [[] for _ in imgs] for key in ("redactions", "barcodes", "objects")}
+    items.update({key: f.result() for key, f in futures.items()})
+    timings.add("detect", time.perf_counter() - t_start)
+    batch_timings = {**timings.as_dict(), "batch_size": len(imgs)}
+
+    results = []
+    for i, img in enumerate(imgs):
+        meta = {
+            "pipeline": pipeline,
+            "mask_applied": False,
+            "redactions": items["redactions"][i],
+            "barcodes": items["barcodes"][i],
+            "objects": items["objects"][i],
+            "detect_scale": {name: round(s, 4) for name, s in scales[i].items()},
+        }
+        t0 = time.perf_counter()
+        mask = mask_from_meta(img.shape[:2], meta)
+        out = effects.apply_effect(img, mask, effect="blur", k=blur_ksize, sigma=blur_sigma, inplace=inplace)
+        meta["mask_applied"] = bool(np.any(mask))
+        meta["timings"] = {**batch_timings, "effect": round(time.perf_counter() - t0, 4)}
+        results.append((out, meta))
+    return results
+
+@lru_cache(maxsize=1)
+def _detector_executor():
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix="detect")
+
+def mask_from_meta(shape_hw, meta: dict) -> np.ndarray:
+    """Rebuild the redaction mask from the polygons listed in redact_image metadata."""
+    mask = np.zeros(shape_hw, dtype=np.uint8)
+    for key in ("redactions", "barcodes", "objects"):
+        for item in meta.get(key, []):
+            pts = np.asarray(item["poly"], dtype=np.int32).reshape(-1, 1, 2)
+            if len(pts):  # OCR can report a line without a box
+                cv2.fillPoly(mask, [pts], 255)
+    return mask
+
+def render_redactions(img: np.ndarray,
+                      meta: dict,
+                      blur_ksize: int = 201,
+                      blur_sigma: float = 0.0,
+                      inplace: bool = False,
+                      tile: int = None):
+    """
+    Blur the regions described by earlier redact_image metadata without running any detector.
+    Tiled results are blurred tile by tile again, at `tile` or else the tile size recorded in meta.
+    """
+    if meta.get("tiles", 1) > 1:
+        # Came from redact_image_tiled: keep the effect memory-bounded as well
+        out = img if inplace else img.copy()
+        polys = [item["poly"] for key in ("redactions", "barcodes", "objects") for item in meta.get(key, [])]
+        return tiling.blur_tiled(out, polys, tile=tile or meta.get("tile", 2048), k=blur_ksize, sigma=blur_sigma)
+    mask = mask_from_meta(img.shape[:2], meta)
+    return effects.apply_effect(img, mask, effect="blur", k=blur_ksize, sigma=blur_sigma, inplace=inplace)
+
 def main():
     parser = argparse.ArgumentParser(description="Redact PII from images")
     parser.add_argument("--input", "-i", default="images/in/license.jpeg", help="Path to input image")
@@ -151,6 +483,10 @@ def main():
     parser.add_argument("--blur-ksize", type=int, default=101, help="Odd kernel size; larger = stronger blur")
     parser.add_argument("--blur-sigma", type=float, default=0.0, help="Sigma; 0 lets OpenCV choose from ksize")
     parser.add_argument("--merge-dist", type=int, default=12, help="Merge boxes within this pixel distance (0 disables)")
+    parser.add_argument("--tile", type=int, default=0, help="Process images larger than this many px per side in overlapping tiles (0 disables)")
+    parser.add_argument("--tile-overlap", type=int, default=256, help="Overlap between neighbouring tiles in px")
+    parser.add_argument("--detect-size", default=detect_scale.SIZE, help="Detection resolution: px, 'auto' or per pipeline, e.g. ocr=auto,object=1280 (0 = native)")
+    parser.add_argument("--detect-margin", type=int, default=detect_scale.MARGIN, help="Px added around polygons found at a reduced resolution")
     args = parser.parse_args()
     
     if not args.input:
@@ -162,8 +498,8 @@ def main():
     outdir = args.outdir
     os.makedirs(outdir, exist_ok=True)
 
-    # read image
-    img = cv2.imread(image_path)
+    # read image (memory-mapped when tiling)
+    img = tiling.open_image(image_path) if args.tile else cv2.imread(image_path)
     if img is None:
         print(f"Failed to read image: {image_path}")
         sys.exit(1)
@@ -175,6 +511,11 @@ def main():
         merge_dist=args.merge_dist,
         pipeline=args.pipeline,
         yoloe_model=args.yoloe_model,
+        inplace=bool(args.tile),
+        tile=args.tile,
+        tile_overlap=args.tile_overlap,
+        detect_size=args.detect_size,
+        detect_margin=args.detect_margin,
     )
 
     # save output
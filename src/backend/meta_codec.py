@@ -0,0 +1,127 @@
+"""
+Compact encodings of redact_image metadata.
+
+JSON spells out every polygon vertex as nested lists, which on dense documents
+and segmentation masks runs to megabytes. The binary formats keep the small
+scalar fields as JSON and pack all polygons of a response into two arrays:
+
+    counts  uint32[n]       vertices per polygon, in the order
+                            redactions, barcodes, objects
+    points  int16[sum, 2]   x, y of every vertex (int32 if a coordinate
+                            does not fit int16)
+
+"binary" envelope (little-endian):
+
+    b"RBM1" | uint32 header_len | header JSON | counts | points | image
+
+The header holds the scalar fields, per-group polygon counts, the redacted
+texts, the points dtype and the byte length of every section. The image
+section is only present when the response carries the redacted image too.
+
+"npz" is a numpy .npz archive of the same arrays plus "header" (the JSON as
+a string) and, optionally, "image" (the encoded image bytes as uint8).
+"""
+import io
+import json
+import base64
+import struct
+import numpy as np
+
+GROUPS = ("redactions", "barcodes", "objects")
+MAGIC = b"RBM1"
+MEDIA_TYPES = {
+    "json": "application/json",
+    "binary": "application/x-redaction-meta",
+    "npz": "application/x-npz",
+}
+
+
+def pack(meta: dict):
+    """Split metadata into (header dict, counts, points)."""
+    header = {k: v for k, v in meta.items() if k not in GROUPS}
+    polys = []
+    header["groups"] = {}
+    for key in GROUPS:
+        items = meta.get(key, [])
+        header["groups"][key] = len(items)
+        polys.extend(np.asarray(item["poly"]).reshape(-1, 2) for item in items)
+    header["texts"] = [item.get("text", "") for item in meta.get("redactions", [])]
+    counts = np.array([len(p) for p in polys], dtype="<u4")
+    points = np.concatenate(polys) if polys else np.empty((0, 2), dtype=np.int64)
+    fits = not len(points) or (points.min() >= -(1 << 15) and points.max() < (1 << 15))
+    points = points.astype("<i2" if fits else "<i4")
+    header["points_dtype"] = points.dtype.str
+    return header, counts, points
+
+
+def unpack(header: dict, counts, points) -> dict:
+    """Inverse of pack(): rebuild the metadata dict with list polygons."""
+    meta = {k: v for k, v in header.items() if k not in ("groups", "texts", "points_dtype", "image_type")}
+    polys = iter(np.split(np.asarray(points).reshape(-1, 2), np.cumsum(counts)[:-1]) if len(counts) else [])
+    for key, kind in zip(GROUPS, ("text", "barcode", "object")):
+        meta[key] = [{"type": kind, "poly": next(polys).tolist()} for _ in range(header["groups"].get(key, 0))]
+    for item, text in zip(meta["redactions"], header["texts"]):
+        item["text"] = text
+    return meta
+
+
+def encode(meta: dict, fmt: str = "json", image: bytes = None, image_type: str = "image/png") -> bytes:
+    """Serialize metadata (and optionally the encoded redacted image) as fmt."""
+    if fmt == "json":
+        body = dict(meta)
+        if image is not None:
+            body["image"] = base64.b64encode(image).decode("ascii")
+            body["image_type"] = image_type
+        return json.dumps(body, separators=(",", ":")).encode()
+
+    header, counts, points = pack(meta)
+    if image is not None:
+        header["image_type"] = image_type
+    if fmt == "npz":
+        buf = io.BytesIO()
+        arrays = {"header": np.array(json.dumps(header)), "counts": counts, "points": points}
+        if image is not None:
+            arrays["image"] = np.frombuffer(image, dtype=np.uint8)
+        np.savez(buf, **arrays)
+        return buf.getvalue()
+    if fmt != "binary":
+        raise ValueError(f"Unknown metadata format: {fmt}")
+
+    header["sections"] = {
+        "counts": counts.nbytes,
+        "points": points.nbytes,
+        "image": len(image) if image is not None else 0,
+    }
+    head = json.dumps(header, separators=(",", ":")).encode()
+    parts = [MAGIC, struct.pack("<I", len(head)), head, counts.tobytes(), points.tobytes()]
+    if image is not None:
+        parts.append(image)
+    return b"".join(parts)
+
+
+def decode(data: bytes, fmt: str = "binary"):
+    """Parse an encode() payload. Returns (meta, image bytes or None)."""
+    if fmt == "json":
+        meta = json.loads(data)
+        image = meta.pop("image", None)
+        if image is not None:
+            image = base64.b64decode(image)
+        return meta, image
+    if fmt == "npz":
+        with np.load(io.BytesIO(data)) as z:
+            header = json.loads(str(z["header"]))
+            image = z["image"].tobytes() if "image" in z.files else None
+            return unpack(header, z["counts"], z["points"]), image
+    if data[:4] != MAGIC:
+        raise ValueError("Not a redaction metadata envelope")
+    (head_len,) = struct.unpack_from("<I", data, 4)
+    pos = 8 + head_len
+    header = json.loads(data[8:pos])
+    sizes = header.pop("sections")
+    counts = np.frombuffer(data, dtype="<u4", count=sizes["counts"] // 4, offset=pos)
+    pos += sizes["counts"]
+    dtype = np.dtype(header["points_dtype"])
+    points = np.frombuffer(data, dtype=dtype, count=sizes["points"] // dtype.itemsize, offset=pos)
+    pos += sizes["points"]
+    image = bytes(data[pos:pos + sizes["image"]]) if sizes["image"] else None
+    return unpack(header, counts, points), image
@@ -0,0 +1,179 @@
+"""
+Stage timings and Prometheus-style metrics.
+
+StageTimings records how long each stage of one call took; redact_image and
+redact_video put the result in their metadata under "timings". The server
+turns those into a Server-Timing header and feeds them, together with its own
+request counters, into the registry below, exposed as text at /metrics.
+
+The registry is a minimal, dependency-free implementation of the Prometheus
+text format (counters, gauges, histograms with labels). It lives in the API
+process; workers report through the metadata they return.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FPS_BUCKETS = (1, 2, 5, 10, 15, 25, 30, 60, 120, 240)
+
+
+class StageTimings:
+    """Seconds per stage for one call. Thread-safe; a stage entered twice accumulates."""
+    def __init__(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def call(self, name, fn, *args, **kwargs):
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def as_dict(self, ndigits: int = 4) -> dict:
+        with self._lock:
+            return {k: round(v, ndigits) for k, v in self.values.items()}
+
+
+def server_timing(timings: dict, prefix: str = "") -> str:
+    """Server-Timing header value from {stage: seconds}."""
+    return ", ".join(
+        f"{prefix}{name};dur={seconds * 1000:.1f}"
+        for name, seconds in timings.items()
+        if isinstance(seconds, (int, float)) and not isinstance(seconds, bool) and name != "batch_size"
+    )
+
+
+# --- registry ---
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, doc, labels=()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_one(key, value))
+        return lines
+
+    def _render_one(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value:g}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])  # cumulative counts, sum, n
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_one(self, key, value):
+        counts, total, n = value
+        lines = []
+        for bound, count in zip(self.buckets, counts):
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (f'{bound:g}',))} {count}")
+        lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + ('+Inf',))} {n}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:g}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# --- the server's metrics ---
+REQUEST_LATENCY = Histogram("redact_request_duration_seconds", "HTTP request latency", ("endpoint", "status"))
+IN_FLIGHT = Gauge("redact_requests_in_flight", "HTTP requests being handled", ("endpoint",))
+STAGE_LATENCY = Histogram("redact_stage_duration_seconds", "Time spent per pipeline stage", ("pipeline", "stage"))
+MODEL_LOAD = Gauge("redact_model_load_seconds", "Model load time at worker startup", ("model", "worker"))
+MODEL_MEMORY = Gauge("redact_model_memory_bytes", "Estimated footprint of loaded models", ("model", "worker"))
+VIDEO_FPS = Histogram("redact_video_fps", "End-to-end frames per second of finished videos", buckets=FPS_BUCKETS)
+VIDEO_FRAMES = Counter("redact_video_frames_total", "Video frames written")
+VIDEO_STAGE_BUSY = Counter("redact_video_stage_busy_seconds_total", "Busy time per video pipeline stage", ("stage",))
+CACHE_REQUESTS = Counter("redact_cache_requests_total", "Result cache lookups", ("result",))
+POOL_PENDING = Gauge("redact_pool_pending", "Requests admitted to the inference pool")
+POOL_REJECTED = Counter("redact_pool_rejected_total", "Requests rejected by the inference pool")
+POOL_REJECTED.inc(0)  # exported as 0 from startup, not only after the first rejection
+
+
+def observe_stages(pipeline: str, timings: dict):
+    for stage, seconds in (timings or {}).items():
+        if isinstance(seconds, (int, float)) and not isinstance(seconds, bool) and stage != "batch_size":
+            STAGE_LATENCY.observe(seconds, pipeline=pipeline, stage=stage)
+
+
+def observe_video(meta: dict):
+    if meta.get("throughput_fps"):
+        VIDEO_FPS.observe(meta["throughput_fps"])
+    VIDEO_FRAMES.inc(meta.get("frames_out", 0))
+    for stage, s in (meta.get("stages") or {}).items():
+        VIDEO_STAGE_BUSY.inc(s.get("busy_s", 0.0), stage=stage)
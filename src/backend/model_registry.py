@@ -0,0 +1,158 @@
+"""
+One place that loads and holds the models of a process.
+
+Models are registered by kind ("ocr", "pii", "yoloe") with a loader and an
+allow-list of names; get(kind, name) returns the loaded model, loading it on
+first use. Image and video paths ask for the same (kind, name), so shared
+weights are in memory once, and a name outside the allow-list (e.g. a model
+path from a query parameter) raises ModelNotAllowed instead of loading.
+
+Loaded models are kept in LRU order under a memory budget
+(REDACT_MODEL_BUDGET_MB, 0 = unbounded): loading past it evicts the least
+recently used ones. An evicted model stays alive until its current callers
+drop it. Footprint is the model's parameter and buffer bytes when it is a
+torch module (or holds them), else the growth in process RSS while loading,
+so it is an estimate.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# YOLOE weights callers may name; YOLOE_MODEL is always allowed
+ALLOWED_YOLOE = tuple(dict.fromkeys(
+    [p.strip() for p in os.getenv("REDACT_ALLOWED_MODELS", "model.pt,model.onnx").split(",") if p.strip()]
+    + [os.getenv("YOLOE_MODEL", "model.pt")]
+))
+BUDGET_BYTES = int(os.getenv("REDACT_MODEL_BUDGET_MB", "0")) << 20
+
+
+class ModelNotAllowed(ValueError):
+    """The requested model is not on its kind's allow-list."""
+
+
+def _rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _tensor_bytes(obj, seen=None) -> int:
+    """Bytes of the torch parameters and buffers reachable from obj (modules, tuples, .model attributes)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (tuple, list)):
+        return sum(_tensor_bytes(o, seen) for o in obj)
+    if callable(getattr(obj, "parameters", None)) and callable(getattr(obj, "buffers", None)):
+        try:
+            tensors = {id(t): t for t in list(obj.parameters()) + list(obj.buffers())}
+            return sum(t.numel() * t.element_size() for t in tensors.values())
+        except Exception:
+            return 0
+    inner = getattr(obj, "model", None)
+    return _tensor_bytes(inner, seen) if inner is not None else 0
+
+
+class ModelRegistry:
+    def __init__(self, budget_bytes: int = 0):
+        self.budget_bytes = budget_bytes
+        self._kinds = {}  # kind -> (loader, allowed names or None for any)
+        self._models = OrderedDict()  # (kind, name) -> entry, least recently used first
+        self._lock = threading.Lock()
+        self._loading = {}  # (kind, name) -> lock, so concurrent callers load once
+        self.evictions = 0
+
+    def register(self, kind: str, loader, allowed=None):
+        """loader(name) builds the model; allowed lists the names get() accepts (None = any)."""
+        with self._lock:
+            self._kinds[kind] = (loader, None if allowed is None else tuple(allowed))
+            for key in [k for k in self._models if k[0] == kind]:
+                del self._models[key]  # built by the previous loader
+
+    def allowed(self, kind: str, name: str) -> bool:
+        entry = self._kinds.get(kind)
+        return entry is not None and (entry[1] is None or name in entry[1])
+
+    def get(self, kind: str, name: str):
+        key = (kind, name)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                entry["uses"] += 1
+                entry["last_used"] = time.time()
+                return entry["model"]
+            if kind not in self._kinds:
+                raise KeyError(f"No loader registered for {kind!r}")
+            loader, allowed = self._kinds[kind]
+            if allowed is not None and name not in allowed:
+                raise ModelNotAllowed(f"{kind} model {name!r} is not allowed (allowed: {', '.join(allowed)})")
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+            if entry is not None:  # loaded by another thread meanwhile
+                return self.get(kind, name)
+            rss0, t0 = _rss(), time.perf_counter()
+            model = loader(name)
+            load_s = time.perf_counter() - t0
+            nbytes = _tensor_bytes(model) or max(0, _rss() - rss0)
+            with self._lock:
+                self._models[key] = {
+                    "model": model, "bytes": nbytes, "load_s": load_s,
+                    "uses": 1, "loaded_at": time.time(), "last_used": time.time(),
+                }
+                self._evict_over_budget(keep=key)
+                self._loading.pop(key, None)
+            print(f"[models] loaded {kind}:{name} in {load_s:.2f}s (~{nbytes >> 20} MiB)")
+            return model
+
+    def _evict_over_budget(self, keep):
+        if not self.budget_bytes:
+            return
+        total = sum(e["bytes"] for e in self._models.values())
+        for key in list(self._models):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._models.pop(key)["bytes"]
+            self.evictions += 1
+            print(f"[models] evicted {key[0]}:{key[1]} (budget {self.budget_bytes >> 20} MiB)")
+
+    def evict(self, kind: str, name: str) -> bool:
+        with self._lock:
+            return self._models.pop((kind, name), None) is not None
+
+    def preload(self, specs) -> dict:
+        """Load each (kind, name) now. Returns {"kind:name": load_seconds}."""
+        timings = {}
+        for kind, name in specs:
+            t0 = time.perf_counter()
+            self.get(kind, name)
+            timings[f"{kind}:{name}"] = round(time.perf_counter() - t0, 3)
+        return timings
+
+    def report(self) -> dict:
+        """Loaded models (least recently used first) with their footprint, and the budget."""
+        with self._lock:
+            models = [
+                {
+                    "kind": kind, "name": name, "bytes": e["bytes"], "load_s": round(e["load_s"], 3),
+                    "uses": e["uses"], "idle_s": round(time.time() - e["last_used"], 1),
+                }
+                for (kind, name), e in self._models.items()
+            ]
+        return {
+            "models": models,
+            "total_bytes": sum(m["bytes"] for m in models),
+            "budget_bytes": self.budget_bytes,
+            "evictions": self.evictions,
+        }
+
+
+MODELS = ModelRegistry(BUDGET_BYTES)
@@ -1,8 +1,7 @@
-from functools import lru_cache
 import numpy as np
 import cv2
+from model_registry import MODELS, ALLOWED_YOLOE
 
-@lru_cache(maxsize=None)
 def _load_yoloe(model_path: str = "model.onnx"):
     # Local import so this module is optional unless the pipeline is used
     try:
@@ -11,15 +10,30 @@ def _load_yoloe(model_path: str = "model.onnx"):
         raise RuntimeError("Ultralytics/YOLOE is required for the object pipeline") from e
     return YOLOE(model_path, task="segment")
 
+MODELS.register("yoloe", _load_yoloe, allowed=ALLOWED_YOLOE)
+
+def get_model(model_path: str = "model.onnx"):
+    """The YOLOE model at model_path, shared with the video path through the registry."""
+    return MODELS.get("yoloe", model_path)
+
 def predict(img: np.ndarray, model_path: str = "model.onnx"):
     """
     Runs YOLOE segmentation/detection and returns a list of polygons (np.ndarray Nx2, int32).
     If only boxes are available, returns 4-point rectangles.
     """
-    model = _load_yoloe(model_path)
+    model = get_model(model_path)
     results = model.predict(img, save=False, verbose=False)
-    res = results[0]
+    return _polys_from_result(results[0])
+
+def predict_batch(imgs, model_path: str = "model.onnx"):
+    """predict() for several images in one batched forward pass. Returns one polygon list per image."""
+    if not imgs:
+        return []
+    model = get_model(model_path)
+    results = model.predict(list(imgs), save=False, verbose=False)
+    return [_polys_from_result(res) for res in results]
 
+def _polys_from_result(res):
     polys = []
     # Segmentation polygons
     if getattr(res, "masks", None) is not None and res.masks is not None:
@@ -32,4 +46,4 @@ def predict(img: np.ndarray, model_path: str = "model.onnx"):
             polys.append(np.array(
                 [[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.int32
             ))
-    return polys
\ No newline at end of file
+    return polys
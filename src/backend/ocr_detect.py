@@ -1,10 +1,11 @@
-from functools import lru_cache
+import time
 import cv2
 import numpy as np
-from paddleocr import PaddleOCR
+from model_registry import MODELS
 
-@lru_cache(maxsize=1)
-def get_ocr():
+def _load_ocr(name="ppocr"):
+    # Local import: paddle is only paid for when the OCR pipeline is used
+    from paddleocr import PaddleOCR
     return PaddleOCR(
         use_doc_orientation_classify=False,
         use_doc_unwarping=False,
@@ -13,14 +14,96 @@ def get_ocr():
         text_det_limit_side_len=1024,
     )
 
-def predict(img: np.ndarray, merge_dist: int = 12):
+MODELS.register("ocr", _load_ocr, allowed=("ppocr",))
+
+def get_ocr():
+    return MODELS.get("ocr", "ppocr")
+
+def predict(img: np.ndarray, merge_dist: int = 12, timings=None):
+    """OCR lines of img, merged within merge_dist. timings (metrics.StageTimings) gets a "merge" stage."""
     ocr = get_ocr()  # reused, not rebuilt per call
     result = ocr.predict(img)[0]
     rec_texts = result["rec_texts"]
     rec_polys = result["rec_polys"]
+    t0 = time.perf_counter()
     rec_texts, rec_polys = merge_boxes_and_texts(rec_polys, rec_texts, merge_dist)
+    if timings is not None:
+        timings.add("merge", time.perf_counter() - t0)
     return rec_texts, rec_polys
 
+def predict_batch(imgs, merge_dist: int = 12, timings=None):
+    """
+    predict() for several images in one PaddleOCR call. Returns a list of (rec_texts, rec_polys).
+    merge_dist is one value for all images or a list with one per image.
+    """
+    if not imgs:
+        return []
+    ocr = get_ocr()
+    results = ocr.predict(list(imgs))
+    dists = merge_dist if isinstance(merge_dist, (list, tuple)) else [merge_dist] * len(results)
+    t0 = time.perf_counter()
+    merged = [
+        merge_boxes_and_texts(result["rec_polys"], result["rec_texts"], d)
+        for result, d in zip(results, dists)
+    ]
+    if timings is not None:
+        timings.add("merge", time.perf_counter() - t0)
+    return merged
+
+# Upper bound on candidate pairs materialized at once by _overlapping_pairs
+_MAX_PAIRS = 1 << 21
+
+def _polys_to_rects(rec_polys):
+    """
+    Int32 point arrays and (x1, y1, x2, y2) bounding rects, matching
+    cv2.boundingRect (x2 = max_x + 1) without a per-polygon OpenCV call.
+    """
+    try:
+        stacked = np.asarray(rec_polys, dtype=np.int32)
+    except ValueError:  # polygons with different point counts
+        stacked = None
+    if stacked is not None and stacked.ndim == 3 and stacked.shape[2] == 2 and stacked.shape[1] > 0:
+        polys_pts = list(stacked)
+        lo, hi = stacked.min(axis=1), stacked.max(axis=1) + 1
+    else:
+        polys_pts = [np.asarray(p, dtype=np.int32).reshape(-1, 2) for p in rec_polys]
+        lo = np.array([p.min(axis=0) for p in polys_pts], dtype=np.int64).reshape(-1, 2)
+        hi = np.array([p.max(axis=0) + 1 for p in polys_pts], dtype=np.int64).reshape(-1, 2)
+    rects = np.concatenate([lo, hi], axis=1).astype(np.int64)
+    return polys_pts, rects
+
+def _sweep_counts(lo, hi):
+    order = np.argsort(lo, kind="stable")
+    end = np.searchsorted(lo[order], hi[order], side="right")
+    return order, end - np.arange(len(lo)) - 1
+
+def _overlapping_pairs(boxes):
+    """
+    Yield (a, b) index arrays of every pair of boxes (x1, y1, x2, y2) whose
+    closed extents intersect. Sort-and-sweep along the axis with fewer
+    candidate pairs, then an exact vectorized test on the other axis.
+    """
+    sweeps = [(_sweep_counts(boxes[:, 0], boxes[:, 2]), 1), (_sweep_counts(boxes[:, 1], boxes[:, 3]), 0)]
+    (order, counts), other = min(sweeps, key=lambda s: int(s[0][1].sum()))
+    olo, ohi = boxes[:, other], boxes[:, other + 2]
+    n = len(order)
+    cum = np.cumsum(counts)
+    i0 = 0
+    while i0 < n:
+        # Rows [i0, i1) produce at most _MAX_PAIRS candidates (or a single row)
+        base = cum[i0 - 1] if i0 else 0
+        i1 = max(i0 + 1, int(np.searchsorted(cum, base + _MAX_PAIRS, side="right")))
+        rows = np.arange(i0, min(i1, n))
+        c = counts[rows]
+        total = int(c.sum())
+        if total:
+            I = np.repeat(rows, c)
+            offsets = np.arange(total) - np.repeat(np.cumsum(c) - c, c)
+            a, b = order[I], order[I + 1 + offsets]
+            keep = (olo[b] <= ohi[a]) & (olo[a] <= ohi[b])
+            yield a[keep], b[keep]
+        i0 = i1
+
 def merge_boxes_and_texts(rec_polys, rec_texts, merge_dist):
     """
     Merge nearby OCR boxes and concatenate their texts based on a pixel distance.
@@ -34,13 +117,7 @@ def merge_boxes_and_texts(rec_polys, rec_texts, merge_dist):
         return [], []
 
     # Build bounding rects (x1,y1,x2,y2) for each polygon
-    rects = []
-    polys_pts = []
-    for p in rec_polys:
-        pts = np.asarray(p, dtype=np.int32).reshape(-1, 2)
-        polys_pts.append(pts)
-        x, y, w, h = cv2.boundingRect(pts)
-        rects.append((x, y, x + w, y + h))
+    polys_pts, rects = _polys_to_rects(rec_polys)
 
     # Disjoint-set union (union-find) to group close rects
     parent = list(range(n))
@@ -56,17 +133,10 @@ def merge_boxes_and_texts(rec_polys, rec_texts, merge_dist):
 
     # Expand rects by merge_dist and intersect to decide merging
     d = merge_dist
-    def expanded(r):
-        return (r[0] - d, r[1] - d, r[2] + d, r[3] + d)
-    def intersects(r1, r2):
-        return not (r1[2] < r2[0] or r2[2] < r1[0] or r1[3] < r2[1] or r2[3] < r1[1])
-
-    for i in range(n):
-        ri = expanded(rects[i])
-        for j in range(i + 1, n):
-            rj = expanded(rects[j])
-            if intersects(ri, rj):
-                union(i, j)
+    expanded = rects + np.array([-d, -d, d, d], dtype=np.int64)
+    for a, b in _overlapping_pairs(expanded):
+        for i, j in zip(a.tolist(), b.tolist()):
+            union(i, j)
 
     # Collect components
     groups = {}
@@ -74,6 +144,7 @@ def merge_boxes_and_texts(rec_polys, rec_texts, merge_dist):
         root = find(i)
         groups.setdefault(root, []).append(i)
 
+    rects = rects.tolist()
     merged_texts, merged_polys = [], []
     for idxs in groups.values():
         # Reading order: top-to-bottom, then left-to-right
@@ -85,4 +156,4 @@ def merge_boxes_and_texts(rec_polys, rec_texts, merge_dist):
         hull = cv2.convexHull(pts).reshape(-1, 2)
         merged_polys.append(hull.tolist())
 
-    return merged_texts, merged_polys
\ No newline at end of file
+    return merged_texts, merged_polys
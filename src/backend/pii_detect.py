@@ -1,61 +1,358 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForTokenClassification
-from functools import lru_cache
+import os
+import json
+import atexit
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from model_registry import MODELS
+import pii_rules
 
-# Load the model and tokenizer
 model_name = "iiiorg/piiranha-v1-detect-personal-information"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForTokenClassification.from_pretrained(model_name)
 
-# Set device
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
+# Inference backend (PII_BACKEND):
+#   torch      eager PyTorch, fp32, on the GPU if there is one
+#   int8       PyTorch with dynamic int8 quantization of the Linear layers (CPU)
+#   onnx       the model exported to ONNX, run by onnxruntime (CPU)
+#   onnx-int8  the ONNX graph with int8 weights (onnxruntime dynamic quantization)
+# Quantized backends can label the odd token differently; benchmarks/bench_pii.py
+# checks their spans against "torch" and compares latency.
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+BACKEND = os.getenv("PII_BACKEND", "torch")
+ONNX_DIR = os.getenv("PII_ONNX_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "redactedbyte", "pii-onnx")
+_THREADS = int(os.getenv("PII_THREADS", "0"))  # CPU threads per process (0 = library default)
+# Rule cascade in front of the model (PII_CASCADE, see pii_rules):
+#   off   every line goes to the model
+#   skip  trivial lines skip the model
+#   full  also: lines fully explained by the rule detectors skip it, and rule
+#         spans are merged into the model's spans
+CASCADES = ("off", "skip", "full")
+CASCADE = os.getenv("PII_CASCADE", "full")
+# Names the verdicts: cached spans from one backend are not reused by another
+model_id = model_name if BACKEND == "torch" else f"{model_name}@{BACKEND}"
 
-@lru_cache(maxsize=1)
-def get_model():
-    # If you load spaCy/transformers/etc., do it here once.
-    # If regex-only, just return a sentinel.
-    return "ready"
+def get_model(backend=None):
+    """Load the tokenizer and model on first use. Returns (tokenizer, model, device)."""
+    return MODELS.get("pii", backend or BACKEND)
+
+def _load_model(backend):
+    # Heavy imports stay local so importing this module is cheap
+    import torch
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+    if _THREADS:
+        torch.set_num_threads(_THREADS)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend.startswith("onnx"):
+        return tokenizer, _OnnxModel(export_onnx(quantize=backend == "onnx-int8")), torch.device("cpu")
+    model = AutoModelForTokenClassification.from_pretrained(model_name)
+    model.eval()
+    if backend == "int8":
+        # Weights stored as int8, activations quantized on the fly; CPU only
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return tokenizer, model, torch.device("cpu")
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model.to(device)
+    return tokenizer, model, device
+
+def export_onnx(quantize=False):
+    """
+    Export the model to ONNX_DIR/model.onnx (and model.int8.onnx with
+    quantize=True) unless already there. Returns the path. Files are written
+    under a temp name and renamed, so workers exporting at once don't clash.
+    """
+    fp32_path = os.path.join(ONNX_DIR, "model.onnx")
+    int8_path = os.path.join(ONNX_DIR, "model.int8.onnx")
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForTokenClassification
+        os.makedirs(ONNX_DIR, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForTokenClassification.from_pretrained(model_name).eval()
+        sample = dict(tokenizer(["Contact John Smith at john@example.com"], return_tensors="pt"))
+        names = list(sample)
+        axes = {name: {0: "batch", 1: "sequence"} for name in names + ["logits"]}
+        tmp = f"{fp32_path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model, (sample,), tmp, input_names=names, output_names=["logits"],
+                dynamic_axes=axes, opset_version=17, dynamo=False,
+            )
+        os.replace(tmp, fp32_path)
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        tmp = f"{int8_path}.{os.getpid()}.tmp"
+        quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, int8_path)
+    return int8_path
+
+class _OnnxModel:
+    """onnxruntime session behind the bits of the transformers model _infer uses (config, model(**inputs).logits)."""
+    def __init__(self, path):
+        import onnxruntime as ort
+        from transformers import AutoConfig
+        self.config = AutoConfig.from_pretrained(model_name)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if _THREADS:
+            options.intra_op_num_threads = _THREADS
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        import torch
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        logits, = self.session.run(["logits"], feed)
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+MODELS.register("pii", _load_model, allowed=BACKENDS)
+
+# --- verdict cache ---
+# normalized text -> the tokens that decide its spans: (start, end, label) for
+# every PII token and for the first non-PII token after each PII run. Both
+# aggregate_redaction variants are decoded from these without the model.
+_CACHE_SIZE = int(os.getenv("PII_CACHE_SIZE", "100000"))
+_CACHE_PATH = os.getenv("PII_CACHE_PATH") or None
+_verdicts = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_counters = {"hits": 0, "misses": 0, "evictions": 0}
+_cascade_counters = {"lines": 0, "skipped": 0, "rules": 0, "model": 0}
+_cache_loaded = False
+
+def normalize(text):
+    """Collapse whitespace runs to one space and strip. Returns (normalized, index_map into text)."""
+    norm = " ".join(text.split())
+    if norm == text:
+        return text, range(len(text))
+    out, index_map = [], []
+    in_space = True  # also drops leading whitespace
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            if not in_space:
+                out.append(" ")
+                index_map.append(i)
+            in_space = True
+        else:
+            out.append(ch)
+            index_map.append(i)
+            in_space = False
+    if out and out[-1] == " ":
+        out.pop()
+        index_map.pop()
+    return "".join(out), index_map
+
+def _cache_get(norm):
+    with _cache_lock:
+        tokens = _verdicts.get(norm)
+        if tokens is None:
+            _cache_counters["misses"] += 1
+            return None
+        _verdicts.move_to_end(norm)
+        _cache_counters["hits"] += 1
+        return tokens
+
+def _cache_put(norm, tokens):
+    with _cache_lock:
+        _verdicts[norm] = tokens
+        _verdicts.move_to_end(norm)
+        while len(_verdicts) > _CACHE_SIZE:
+            _verdicts.popitem(last=False)
+            _cache_counters["evictions"] += 1
+
+def cache_stats():
+    with _cache_lock:
+        lookups = _cache_counters["hits"] + _cache_counters["misses"]
+        return {
+            **_cache_counters,
+            "hit_rate": round(_cache_counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(_verdicts),
+        }
+
+def cascade_stats():
+    """Lines seen by the cascade and how they were resolved; skip_rate = share that never reached the model."""
+    with _cache_lock:
+        lines = _cascade_counters["lines"]
+        return {
+            "mode": CASCADE,
+            **_cascade_counters,
+            "skip_rate": round((lines - _cascade_counters["model"]) / lines, 4) if lines else 0.0,
+        }
+
+def clear_cache():
+    with _cache_lock:
+        _verdicts.clear()
+        for k in _cache_counters:
+            _cache_counters[k] = 0
+        for k in _cascade_counters:
+            _cascade_counters[k] = 0
+
+def save_cache(path=None):
+    path = path or _CACHE_PATH
+    with _cache_lock:
+        data = [[norm, [list(t) for t in tokens]] for norm, tokens in _verdicts.items()]
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"model": model_id, "verdicts": data}, f)
+    os.replace(tmp, path)
+
+def load_cache(path=None):
+    """Merge verdicts saved by save_cache (ignored if they came from another model)."""
+    path = path or _CACHE_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if data.get("model") != model_id:
+        return 0
+    for norm, tokens in data.get("verdicts", []):
+        _cache_put(norm, tuple(tuple(t) for t in tokens))
+    return len(data.get("verdicts", []))
+
+def _ensure_cache_loaded():
+    global _cache_loaded
+    if _cache_loaded or not _CACHE_PATH:
+        return
+    _cache_loaded = True
+    load_cache(_CACHE_PATH)
+    atexit.register(save_cache, _CACHE_PATH)
 
 def predict(text, aggregate_redaction=False):
-    _ = get_model()  # ensures one-time init
-    # Tokenize input text
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    inputs = {k: v.to(device) for k, v in inputs.items()}
-    # Get model predictions
-    with torch.no_grad():
-        outputs = model(**inputs)
-    # Get predicted labels
-    predictions = torch.argmax(outputs.logits, dim=-1)
-    # Token offsets for redaction
-    encoded_inputs = tokenizer.encode_plus(text, return_offsets_mapping=True, add_special_tokens=True)
-    offset_mapping = encoded_inputs['offset_mapping']
-    masked_text = list(text)
+    masked_texts, _ = predict_batch([text], aggregate_redaction=aggregate_redaction)
+    return masked_texts[0]
+
+def predict_batch(texts, aggregate_redaction=False, batch_size=32, cascade=None):
+    """
+    Batched PII detection. Lines first pass the rule cascade (`cascade`,
+    default CASCADE); the rest are looked up in the verdict cache by their
+    normalized text; only unseen lines reach the model, tokenized once (with
+    offsets) and padded per chunk to its longest line, one forward pass per chunk.
+    Returns (masked_texts, spans) where spans[i] is a list of
+    (start, end, pii_type) character ranges redacted in texts[i].
+    """
+    _ensure_cache_loaded()
+    cascade = cascade or CASCADE
+    if cascade not in CASCADES:
+        raise ValueError(f"Unknown PII cascade {cascade!r} (expected one of {', '.join(CASCADES)})")
+    texts = [t if isinstance(t, str) else str(t) for t in texts]
+    normed = [normalize(t) for t in texts]
+    verdicts, rule_spans, missing, seen = {}, {}, [], set()
+    counts = dict.fromkeys(_cascade_counters, 0)
+    for norm, _ in normed:
+        if not norm:
+            continue
+        if norm in seen:  # repeated within this batch
+            if norm in verdicts:
+                with _cache_lock:
+                    _cache_counters["hits"] += 1
+            continue
+        seen.add(norm)
+        counts["lines"] += 1
+        if cascade != "off":
+            kind, found = pii_rules.classify(norm)
+            if kind == "skip" or kind == "rules" and cascade == "full":
+                counts["skipped" if kind == "skip" else "rules"] += 1
+                rule_spans[norm] = found
+                continue
+            if cascade == "full" and found:
+                rule_spans[norm] = found  # merged with the model's below
+        counts["model"] += 1
+        verdicts[norm] = _cache_get(norm)
+        if verdicts[norm] is None:
+            missing.append(norm)
+    verdicts.update(_run_model(missing, batch_size))
+    with _cache_lock:
+        for k, v in counts.items():
+            _cascade_counters[k] += v
+
+    masked_texts, spans = [], []
+    for text, (norm, index_map) in zip(texts, normed):
+        found = decode_spans(verdicts.get(norm) or (), len(norm), aggregate_redaction)
+        if norm in rule_spans:
+            found = pii_rules.merge_spans(found, rule_spans[norm])
+        # Back to positions in the original text
+        found = [(index_map[a], index_map[b - 1] + 1, t) for a, b, t in found if b > a]
+        spans.append(found)
+        masked_texts.append(mask_text(text, found, aggregate_redaction))
+    return masked_texts, spans
+
+def _run_model(texts, batch_size=32):
+    """Run the model on texts and cache their deciding tokens. Returns {text: tokens}."""
+    results = _infer(texts, batch_size)
+    for text, tokens in results.items():
+        _cache_put(text, tokens)
+    return results
+
+def _infer(texts, batch_size=32, backend=None):
+    """The deciding tokens of each text from one backend's model, uncached. Returns {text: tokens}."""
+    if not texts:
+        return {}
+    import torch
+    tokenizer, model, device = get_model(backend)  # ensures one-time init
+    id2label, outside = model.config.id2label, model.config.label2id['O']
+    batch_size = max(1, int(batch_size))
+    results = {}
+    # Group similar lengths together so chunks pad as little as possible
+    order = sorted(texts, key=len)
+    for c in range(0, len(order), batch_size):
+        chunk = order[c:c + batch_size]
+        enc = tokenizer(
+            chunk,
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            return_offsets_mapping=True,
+        )
+        offsets = enc.pop("offset_mapping").tolist()
+        inputs = {k: v.to(device) for k, v in enc.items()}
+        with torch.no_grad():
+            outputs = model(**inputs)
+        predictions = torch.argmax(outputs.logits, dim=-1).cpu().tolist()
+        for row, text in enumerate(chunk):
+            tokens, in_pii = [], False
+            for (start, end), label in zip(offsets[row], predictions[row]):
+                if start == end:  # Special or padding token
+                    continue
+                if label != outside:
+                    tokens.append((start, end, id2label[label]))
+                    in_pii = True
+                elif in_pii:  # closes the run, so its end matters
+                    tokens.append((start, end, 'O'))
+                    in_pii = False
+            results[text] = tuple(tokens)
+    return results
+
+def decode_spans(tokens, text_len, aggregate_redaction=False):
+    """Turn (start, end, label) tokens into (start, end, pii_type) character spans."""
+    spans = []
     is_redacting = False
     redaction_start = 0
     current_pii_type = ''
-    for i, (start, end) in enumerate(offset_mapping):
-        if start == end:  # Special token
-            continue
-        label = predictions[0][i].item()
-        if label != model.config.label2id['O']:  # PII detected
-            pii_type = model.config.id2label[label]
+    for start, end, label in tokens:
+        if label != 'O':  # PII detected
+            pii_type = label
             if not is_redacting:
                 is_redacting = True
                 redaction_start = start
                 current_pii_type = pii_type
             elif not aggregate_redaction and pii_type != current_pii_type:
                 # End current redaction and start a new one
-                apply_redaction(masked_text, redaction_start, start, current_pii_type, aggregate_redaction)
+                spans.append((redaction_start, start, current_pii_type))
                 redaction_start = start
                 current_pii_type = pii_type
         else:
             if is_redacting:
-                apply_redaction(masked_text, redaction_start, end, current_pii_type, aggregate_redaction)
+                spans.append((redaction_start, end, current_pii_type))
                 is_redacting = False
     # Handle case where PII is at the end of the text
     if is_redacting:
-        apply_redaction(masked_text, redaction_start, len(masked_text), current_pii_type, aggregate_redaction)
+        spans.append((redaction_start, text_len, current_pii_type))
+    return spans
+
+def mask_text(text, spans, aggregate_redaction=False):
+    masked_text = list(text)
+    for start, end, pii_type in spans:
+        apply_redaction(masked_text, start, end, pii_type, aggregate_redaction)
     return ''.join(masked_text)
 
 def apply_redaction(masked_text, start, end, pii_type, aggregate_redaction):
@@ -0,0 +1,134 @@
+"""
+Rule-based PII detectors run before the transformer (pii_detect's cascade).
+
+classify(text) sorts one normalized OCR line into:
+  skip   nothing a model could call PII: no letters or digits, a short number
+         (fewer than MIN_DIGITS digits, no letters), or one lowercase word
+         (names are capitalized, so a lone capitalized word still goes on)
+  rules  every part of the line is matched by a detector below, apart from
+         label words like "Email:" or "Tel" -- the model is not needed
+  model  anything else; the rule spans found so far are merged with the
+         model's spans
+
+Detectors, each giving (start, end, label) with the model's label names:
+  email  address regex
+  card   13-19 digits (spaces/dashes allowed) passing the Luhn checksum
+  iban   country code + 2 check digits + BBAN, valid mod 97
+  phone  8-15 digits with phone punctuation, starting with + ( or 0; a
+         leading 0 needs at least 10 digits (trunk prefix + area code +
+         number) and either a phone label right before it ("Tel", "Fax:")
+         or phone-shaped grouping: a 2-5 digit prefix group, and not all
+         4-digit blocks like an account number ("020 7946 0958" passes,
+         "0123456789" and "0044 0532 0130" do not). Anything containing a
+         date shape (01.02.2023, 31/12/24, 2023-01-02, 01/2024) is left to
+         the model
+"""
+import re
+
+MIN_DIGITS = 5
+MIN_TRUNK_DIGITS = 10
+LABEL_WORDS = {
+    "email", "e-mail", "mail", "tel", "telephone", "phone", "mobile", "mob", "cell", "fax",
+    "card", "credit", "debit", "number", "no", "nr", "iban", "account", "acct", "contact",
+}
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_CARD = re.compile(r"(?<![\d-])\d(?:[ -]?\d){12,18}(?![\d-])")
+_IBAN = re.compile(r"\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?\b")
+_PHONE = re.compile(r"(?<![\w+])(?:\+|\(|0)[\d ()./-]{7,20}\d(?!\w)")
+_PHONE_LABEL = re.compile(r"\b(?:tel|telephone|phone|mobile|mob|cell|fax)\b(?:\W*(?:no|nr|number)\b)?\W*$", re.I)
+_DATE = re.compile(
+    r"(?<!\d)(?:\d{1,2}([./-])\d{1,2}\1(?:\d{4}|\d{2})|\d{4}([./-])\d{1,2}\2\d{1,2}|\d{1,2}[./]\d{4})(?!\d)"
+)
+_WORD = re.compile(r"[^\W_]+(?:-[^\W_]+)*")
+
+
+def luhn_valid(digits: str) -> bool:
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = int(ch)
+        if i % 2:
+            d = d * 2 - 9 if d > 4 else d * 2
+        total += d
+    return total % 10 == 0
+
+
+def iban_valid(iban: str) -> bool:
+    s = iban.replace(" ", "")
+    if not 15 <= len(s) <= 34:
+        return False
+    s = s[4:] + s[:4]
+    return int("".join(str(int(c, 36)) for c in s)) % 97 == 1
+
+
+def phone_shaped(number: str) -> bool:
+    """Digit groups read as prefix + number, not one long run or uniform 4-digit blocks."""
+    groups = re.findall(r"\d+", number)
+    return len(groups) >= 2 and 2 <= len(groups[0]) <= 5 and not all(len(g) == 4 for g in groups)
+
+
+def find_spans(text: str):
+    """(start, end, label) of every rule match, non-overlapping, in order."""
+    found = []
+
+    def add(start, end, label):
+        if all(end <= a or start >= b for a, b, _ in found):
+            found.append((start, end, label))
+
+    for m in _EMAIL.finditer(text):
+        add(m.start(), m.end(), "I-EMAIL")
+    for m in _IBAN.finditer(text):
+        if iban_valid(m.group()):
+            add(m.start(), m.end(), "I-ACCOUNTNUM")
+    for m in _CARD.finditer(text):
+        if luhn_valid(re.sub(r"\D", "", m.group())):
+            add(m.start(), m.end(), "I-CREDITCARDNUMBER")
+    for m in _PHONE.finditer(text):
+        digits = sum(c.isdigit() for c in m.group())
+        if _DATE.search(m.group()):
+            continue
+        if m.group().startswith("0") and (
+            digits < MIN_TRUNK_DIGITS
+            or not (phone_shaped(m.group()) or _PHONE_LABEL.search(text[:m.start()]))
+        ):
+            continue
+        if 8 <= digits <= 15:
+            add(m.start(), m.end(), "I-TELEPHONENUM")
+    return sorted(found)
+
+
+def is_trivial(text: str) -> bool:
+    if not any(c.isalnum() for c in text):
+        return True
+    if not any(c.isalpha() for c in text):
+        return sum(c.isdigit() for c in text) < MIN_DIGITS
+    words = _WORD.findall(text)
+    return len(words) == 1 and words[0].isalpha() and words[0].islower()
+
+
+def classify(text: str):
+    """("skip" | "rules" | "model", spans) for one normalized line."""
+    if is_trivial(text):
+        return "skip", []
+    spans = find_spans(text)
+    if spans:
+        rest, pos = [], 0
+        for start, end, _ in spans:
+            rest.append(text[pos:start])
+            pos = end
+        rest.append(text[pos:])
+        if all(w.lower() in LABEL_WORDS for w in _WORD.findall(" ".join(rest))):
+            return "rules", spans
+    return "model", spans
+
+
+def merge_spans(a, b):
+    """Union of two span lists; overlapping spans become one, keeping the first one's label."""
+    merged = []
+    for start, end, label in sorted(a + b):
+        if merged and start < merged[-1][1]:
+            s, e, l = merged[-1]
+            merged[-1] = (s, max(e, end), l)
+        else:
+            merged.append((start, end, label))
+    return merged
@@ -0,0 +1,133 @@
+"""
+Content-addressed cache of redaction results.
+
+Entries map sha256(image bytes + detection parameters) to the metadata that
+redact_image returned: detected texts and the polygons of every redacted
+region. On a hit the caller only re-applies the effect (main.render_redactions)
+and re-encodes, so OCR, PII, barcode and YOLOE are skipped entirely.
+Effect parameters (blur kernel/sigma) are deliberately not part of the key:
+they do not change what is detected and are applied fresh on every hit.
+
+Tiers: a size-bounded in-memory LRU, plus an optional on-disk tier (one JSON
+file per entry, oldest evicted first) that survives restarts and is shared by
+processes pointing at the same directory.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def cache_key(data: bytes, **params) -> str:
+    h = hashlib.sha256(data)
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class RedactionCache:
+    def __init__(self, max_bytes: int = 64 << 20, disk_dir: str = None, disk_max_bytes: int = 1 << 30):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._mem = OrderedDict()  # key -> serialized metadata
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(e.stat().st_size for e in os.scandir(disk_dir) if e.name.endswith(".json"))
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str):
+        """Metadata for key (a fresh copy), or None."""
+        with self._lock:
+            blob = self._mem.get(key)
+            if blob is not None:
+                self._mem.move_to_end(key)
+                self.counters["hits"] += 1
+                self.counters["memory_hits"] += 1
+                return json.loads(blob)
+        if self.disk_dir:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    blob = f.read()
+                os.utime(self._path(key))  # recency for disk eviction
+            except OSError:
+                blob = None
+            if blob is not None:
+                with self._lock:
+                    self.counters["hits"] += 1
+                    self.counters["disk_hits"] += 1
+                    self._remember(key, blob)
+                return json.loads(blob)
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, meta: dict):
+        blob = json.dumps(meta, separators=(",", ":"))
+        with self._lock:
+            self.counters["stores"] += 1
+            self._remember(key, blob)
+        if self.disk_dir:
+            self._write_disk(key, blob)
+
+    def _remember(self, key, blob):
+        # Caller holds the lock
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        if len(blob) > self.max_bytes:
+            return
+        self._mem[key] = blob
+        self._mem_bytes += len(blob)
+        while self._mem_bytes > self.max_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _write_disk(self, key, blob):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(blob)
+            os.replace(tmp, path)  # atomic, so readers never see half an entry
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += len(blob)
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+        # Over budget: drop least recently used files until 90% of the budget
+        entries = sorted(
+            (e for e in os.scandir(self.disk_dir) if e.name.endswith(".json")),
+            key=lambda e: e.stat().st_mtime,
+        )
+        total = sum(e.stat().st_size for e in entries)
+        for e in entries:
+            if total <= self.disk_max_bytes * 0.9:
+                break
+            try:
+                size = e.stat().st_size
+                os.remove(e.path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._mem),
+                "memory_bytes": self._mem_bytes,
+                "disk_bytes": self._disk_bytes if self.disk_dir else None,
+            }
@@ -1,13 +1,58 @@
-from fastapi import FastAPI, UploadFile, File, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
+import time
+_IMPORT_T0 = time.perf_counter()
+
+from fastapi import FastAPI, Request, UploadFile, File, Query, Header, BackgroundTasks
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from typing import List
 import numpy as np
 import cv2
-from io import BytesIO
-from main import redact_image, redact_video
-import ocr_detect, barcode_detect, pii_detect
+import json
+import base64
+import asyncio
+from worker_pool import InferencePool, PoolSaturated, PoolUnavailable, default_workers
+from video_jobs import JobStore, save_upload
+from image_batch import expand_inputs, ordered_chunks, read_entries, ZipStream
+from result_cache import RedactionCache, cache_key
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from main import render_redactions
+import meta_codec
+import image_encode
+import metrics
+import pii_detect
+import detect_scale
+from model_registry import ALLOWED_YOLOE
 import tempfile, os
 
+# Pipelines whose models are preloaded at startup ("ocr", "object", "video", "all").
+# Anything else is loaded lazily on first request.
+WARMUP_PIPELINES = [p.strip() for p in os.getenv("REDACT_WARMUP_PIPELINES", "ocr").split(",") if p.strip()]
+YOLOE_MODEL = os.getenv("YOLOE_MODEL", "model.pt")
+# Images above this many px per side are redacted in overlapping tiles (0 = never)
+TILE_SIZE = int(os.getenv("REDACT_TILE", "0"))
+TILE_OVERLAP = int(os.getenv("REDACT_TILE_OVERLAP", "256"))
+# Videos are split into up to this many segments redacted in parallel (0 = one per worker, 1 = off)
+VIDEO_SEGMENTS = int(os.getenv("REDACT_VIDEO_SEGMENTS", "1"))
+POOL = InferencePool(
+    workers=default_workers(),
+    queue_size=int(os.getenv("REDACT_QUEUE_SIZE", "8")),
+    pipelines=WARMUP_PIPELINES,
+    yoloe_model=YOLOE_MODEL,
+)
+JOBS = JobStore(
+    POOL,
+    root=os.getenv("REDACT_JOB_DIR") or None,
+    ttl=float(os.getenv("REDACT_JOB_TTL", "3600")),
+    max_jobs=int(os.getenv("REDACT_MAX_JOBS", "64")),
+)
+CACHE = RedactionCache(
+    max_bytes=int(os.getenv("REDACT_CACHE_MB", "64")) << 20,
+    disk_dir=os.getenv("REDACT_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("REDACT_CACHE_DISK_MB", "1024")) << 20,
+)
+STARTUP_REPORT = {"import_s": round(time.perf_counter() - _IMPORT_T0, 3)}
+
 app = FastAPI(title="RedactedByte API", version="1.0.0")
 
 app.add_middleware(
@@ -19,13 +64,103 @@ app.add_middleware(
 
 @app.on_event("startup")
 def warmup():
-    ocr_detect.get_ocr()
-    barcode_detect.get_detector()
-    pii_detect.get_model()
+    t0 = time.perf_counter()
+    STARTUP_REPORT["pipelines"] = WARMUP_PIPELINES
+    STARTUP_REPORT["workers"] = POOL.warmup()  # {pid: {model: load seconds}}
+    for pid, loads in STARTUP_REPORT["workers"].items():
+        for model, seconds in loads.items():
+            metrics.MODEL_LOAD.set(seconds, model=model, worker=pid)
+    STARTUP_REPORT["warmup_s"] = round(time.perf_counter() - t0, 3)
+    STARTUP_REPORT["total_s"] = round(time.perf_counter() - _IMPORT_T0, 3)
+    print(f"[startup] {STARTUP_REPORT}")
+
+@app.on_event("startup")
+async def start_job_reaper():
+    JOBS.start_reaper()  # needs the running loop, hence its own async hook
+
+@app.on_event("shutdown")
+def shutdown():
+    JOBS.shutdown()
+    POOL.shutdown()
+
+def route_label(request: Request) -> str:
+    # Route template, not the raw path, so job ids don't blow up the label set
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path.rstrip("/") or "/"
+    return "other"
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    endpoint = route_label(request)
+    t0 = time.perf_counter()
+    metrics.IN_FLIGHT.inc(endpoint=endpoint)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.IN_FLIGHT.dec(endpoint=endpoint)
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - t0, endpoint=endpoint, status=status)
+
+def model_not_allowed(yolo_model: str):
+    return JSONResponse(
+        {"error": f"Model {yolo_model!r} is not allowed", "allowed": list(ALLOWED_YOLOE)}, status_code=400,
+    )
+
+def pool_error(e: Exception):
+    if isinstance(e, PoolSaturated):
+        return JSONResponse({"error": "Server busy, retry later"}, status_code=429, headers={"Retry-After": "1"})
+    return JSONResponse({"error": "Inference workers unavailable"}, status_code=503, headers={"Retry-After": "5"})
+
+def image_cache_key(data, merge_dist: int, tile: int = 0, detect_size: str = None, detect_margin: int = None) -> str:
+    # Same bytes + same detection settings -> same regions; only the effect is redone
+    params = {"tile": tile, "tile_overlap": TILE_OVERLAP} if tile else {}
+    detect = {
+        "detect_size": detect_scale.parse(detect_size),
+        "detect_margin": detect_scale.MARGIN if detect_margin is None else detect_margin,
+    }
+    return cache_key(data, merge_dist=merge_dist, pipeline="all", yoloe_model=YOLOE_MODEL, pii_model=pii_detect.model_id, pii_cascade=pii_detect.CASCADE, **detect, **params)
+
+def bad_detect_size(detect_size: str):
+    try:
+        detect_scale.parse(detect_size)
+    except ValueError as e:
+        return JSONResponse({"error": f"Invalid detect_size: {e}"}, status_code=400)
+    return None
+
+async def read_upload(file: UploadFile) -> np.ndarray:
+    """Upload bytes as uint8; uploads Starlette already spooled to disk are memory-mapped, not read."""
+    f = file.file
+    if getattr(f, "_rolled", False):
+        f.flush()
+        return np.memmap(f, dtype=np.uint8, mode="r")
+    return np.frombuffer(await file.read(), dtype=np.uint8)
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "pool": POOL.stats(), "cache": CACHE.stats(), "workers": POOL.worker_counters()}
+
+@app.get("/startup")
+def startup_report():
+    return STARTUP_REPORT
+
+@app.get("/models")
+def loaded_models():
+    """Models loaded in each worker with their estimated footprint (as of each worker's last call)."""
+    return {"allowed_yoloe": list(ALLOWED_YOLOE), "workers": POOL.worker_models()}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    stats = POOL.stats()
+    metrics.POOL_PENDING.set(stats["pending"])
+    metrics.MODEL_MEMORY.clear()  # evicted models drop out
+    for pid, report in POOL.worker_models().items():
+        for m in report["models"]:
+            metrics.MODEL_MEMORY.set(m["bytes"], model=f"{m['kind']}:{m['name']}", worker=pid)
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/redact/")  # allow trailing slash too
 @app.post("/redact")
@@ -35,24 +170,248 @@ async def redact(
     blur_sigma: float = Query(0.0),
     merge_dist: int = Query(20, ge=0),
     meta: bool = Query(False, description="Return JSON metadata instead of an image"),
+    tile: int = Query(TILE_SIZE, ge=0, description="Tile images larger than this many px per side (0 disables)"),
+    meta_format: str = Query("json", pattern="^(json|binary|npz)$", description="Metadata encoding (see meta_codec)"),
+    with_image: bool = Query(False, description="Return the redacted image and its metadata in one response"),
+    image_format: str = Query(None, pattern="^(png|jpe?g|webp)$", description="Output format; default from the Accept header, else PNG"),
+    quality: int = Query(90, ge=1, le=100, description="JPEG/WebP quality"),
+    compression: int = Query(None, ge=0, le=9, description="PNG compression level"),
+    detect_size: str = Query(None, description="Detection resolution: px, 'auto' or per pipeline, e.g. ocr=auto,object=1280 (0 = native; default REDACT_DETECT_SIZE)"),
+    detect_margin: int = Query(None, ge=0, description="Px added around polygons found at a reduced resolution"),
+    accept: str = Header(None),
 ):
-    data = await file.read()
-    npbuf = np.frombuffer(data, dtype=np.uint8)
-    img = cv2.imdecode(npbuf, cv2.IMREAD_COLOR)
+    fmt = image_encode.negotiate(accept, image_format)
+    timings = metrics.StageTimings()  # server-side stages; the worker's come back in info["timings"]
+    data = await read_upload(file)
+    with timings.stage("decode"):
+        # Decoding a multi-megapixel upload would stall every other request on the loop
+        img = await run_in_threadpool(cv2.imdecode, data, cv2.IMREAD_COLOR) if data.size else None
     if img is None:
         return JSONResponse({"error": "Invalid image"}, status_code=400)
+    if tile and tile <= TILE_OVERLAP:
+        return JSONResponse({"error": f"tile must be larger than {TILE_OVERLAP}"}, status_code=400)
+    error = bad_detect_size(detect_size)
+    if error is not None:
+        return error
+
+    # Hashing the whole upload and reading the disk tier would block the loop too
+    with timings.stage("cache"):
+        key = await run_in_threadpool(
+            image_cache_key, data, merge_dist, tile if max(img.shape[:2]) > tile else 0, detect_size, detect_margin,
+        )
+        data = None
+        info = await run_in_threadpool(CACHE.get, key)
+    cache_status = "HIT" if info is not None else "MISS"
+    metrics.CACHE_REQUESTS.inc(result=cache_status.lower())
+    if info is None:
+        try:
+            with timings.stage("pool"):
+                out_img, info = await POOL.redact_image(
+                    img, blur_ksize=blur_ksize, blur_sigma=blur_sigma, merge_dist=merge_dist, yoloe_model=YOLOE_MODEL,
+                    tile=tile, tile_overlap=TILE_OVERLAP, detect_size=detect_size, detect_margin=detect_margin,
+                )
+        except (PoolSaturated, PoolUnavailable) as e:
+            return pool_error(e)
+        metrics.observe_stages("image", info.get("timings"))
+        # timings belong to this run only
+        await run_in_threadpool(CACHE.put, key, {k: v for k, v in info.items() if k != "timings"})
+    elif with_image or not meta:
+        with timings.stage("render"):
+            out_img = await run_in_threadpool(
+                render_redactions, img, info, blur_ksize=blur_ksize, blur_sigma=blur_sigma, inplace=True, tile=tile or None,
+            )
 
-    out_img, info = redact_image(img, blur_ksize=blur_ksize, blur_sigma=blur_sigma, merge_dist=merge_dist)
+    def headers(**extra):
+        # Worker stages (ocr, pii, ...) plus this process's own (decode, cache, pool, encode)
+        value = ", ".join(
+            v for v in (
+                metrics.server_timing(info.get("timings") or {}),
+                metrics.server_timing(timings.as_dict(), prefix="api-"),
+            ) if v
+        )
+        return {"X-Cache": cache_status, "Server-Timing": value, **extra}
 
-    if meta:
-        h, w = out_img.shape[:2]
+    if meta or with_image:
+        h, w = img.shape[:2]
         info.update({"width": int(w), "height": int(h)})
-        return JSONResponse(info)
+        if meta_format == "json" and not with_image:
+            return JSONResponse(info, headers=headers())
+
+        def encode():
+            if not with_image:
+                return meta_codec.encode(info, meta_format)
+            buf, media_type = image_encode.encode(out_img, fmt, quality=quality, compression=compression)
+            return meta_codec.encode(info, meta_format, image=buf, image_type=media_type)
+        try:
+            with timings.stage("encode"):
+                body = await run_in_threadpool(encode)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        return Response(body, media_type=meta_codec.MEDIA_TYPES[meta_format], headers=headers())
+
+    # Encoding a large photo takes long enough to stall the event loop
+    try:
+        with timings.stage("encode"):
+            buf, media_type = await run_in_threadpool(
+                image_encode.encode, out_img, fmt, quality=quality, compression=compression,
+            )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+    return Response(buf, media_type=media_type, headers=headers(Vary="Accept"))
+
+BATCH_RETRIES = 8  # waits for a free worker slot, up to ~13 s per chunk
 
-    ok, enc = cv2.imencode(".png", out_img)
-    if not ok:
-        return JSONResponse({"error": "Failed to encode image"}, status_code=500)
-    return StreamingResponse(BytesIO(enc.tobytes()), media_type="image/png")
+async def redact_chunk(imgs, **kwargs):
+    """POOL.redact_images, waiting out saturation instead of failing mid-stream."""
+    for attempt in range(BATCH_RETRIES + 1):
+        try:
+            return await POOL.redact_images(imgs, **kwargs)
+        except PoolSaturated:
+            if attempt == BATCH_RETRIES:
+                raise
+            await asyncio.sleep(min(2.0, 0.1 * 2 ** attempt))
+
+@app.post("/redact/batch/")  # allow trailing slash too
+@app.post("/redact/batch")
+async def redact_batch(
+    files: List[UploadFile] = File(..., description="Images and/or zip archives of images"),
+    blur_ksize: int = Query(101, ge=1),
+    blur_sigma: float = Query(0.0),
+    merge_dist: int = Query(20, ge=0),
+    format: str = Query("ndjson", pattern="^(ndjson|zip)$"),
+    meta: bool = Query(False, description="Return metadata only, no images"),
+    batch_size: int = Query(8, ge=1, le=64, description="Images per batched model call"),
+    image_format: str = Query("png", pattern="^(png|jpe?g|webp)$"),
+    quality: int = Query(90, ge=1, le=100, description="JPEG/WebP quality"),
+    compression: int = Query(None, ge=0, le=9, description="PNG compression level"),
+    detect_size: str = Query(None, description="Detection resolution: px, 'auto' or per pipeline, e.g. ocr=auto,object=1280 (0 = native; default REDACT_DETECT_SIZE)"),
+    detect_margin: int = Query(None, ge=0, description="Px added around polygons found at a reduced resolution"),
+):
+    """
+    Redact many images in one request. Images are batched through the models
+    `batch_size` at a time; results stream back in input order as NDJSON lines
+    ({index, filename, cache, meta, image: base64, image_type} or {index, filename, error})
+    or as a zip with NNNNN_name.<ext> + NNNNN_name.json per input.
+    """
+    if POOL.saturated():
+        return pool_error(PoolSaturated())
+    error = bad_detect_size(detect_size)
+    if error is not None:
+        return error
+    fmt = image_encode.negotiate(requested=image_format)
+    ext = image_encode.FORMATS[fmt][0]
+    try:
+        entries, close_inputs = await run_in_threadpool(expand_inputs, files)
+    except Exception:
+        return JSONResponse({"error": "Invalid zip archive"}, status_code=400)
+    if not entries:
+        close_inputs()
+        return JSONResponse({"error": "No images"}, status_code=400)
+
+    async def process(first, chunk):
+        datas = await read_entries(chunk)
+        imgs = await run_in_threadpool(
+            lambda: [cv2.imdecode(np.frombuffer(d, dtype=np.uint8), cv2.IMREAD_COLOR) for d in datas]
+        )
+
+        def lookup():
+            # sha256 of every upload plus disk-tier reads, off the event loop
+            found = []
+            for data, img in zip(datas, imgs):
+                if img is None:
+                    found.append((None, None))
+                    continue
+                key = image_cache_key(data, merge_dist, detect_size=detect_size, detect_margin=detect_margin)
+                found.append((key, CACHE.get(key)))
+            return found
+
+        records, misses = [], []
+        for i, ((name, _), img, (key, info)) in enumerate(zip(chunk, imgs, await run_in_threadpool(lookup))):
+            rec = {"index": first + i, "filename": name}
+            records.append(rec)
+            if img is None:
+                rec["error"] = "Invalid image"
+                continue
+            rec["key"], rec["img"], rec["meta"] = key, img, info
+            rec["cache"] = "HIT" if rec["meta"] is not None else "MISS"
+            metrics.CACHE_REQUESTS.inc(result=rec["cache"].lower())
+            if rec["meta"] is None:
+                misses.append(rec)
+        if misses:
+            try:
+                results = await redact_chunk(
+                    [r["img"] for r in misses],
+                    blur_ksize=blur_ksize, blur_sigma=blur_sigma, merge_dist=merge_dist, yoloe_model=YOLOE_MODEL,
+                    detect_size=detect_size, detect_margin=detect_margin,
+                )
+            except (PoolSaturated, PoolUnavailable) as e:
+                for r in misses:
+                    r["error"] = str(e)
+            else:
+                metrics.observe_stages("batch", results[0][1].get("timings"))  # detection stages are shared by the chunk
+                for r, (out, info) in zip(misses, results):
+                    r["out"], r["meta"] = out, info
+                await run_in_threadpool(lambda: [
+                    CACHE.put(r["key"], {k: v for k, v in r["meta"].items() if k != "timings"}) for r in misses
+                ])
+
+        def finish():
+            for r in records:
+                img = r.pop("img", None)
+                out = r.pop("out", None)
+                r.pop("key", None)
+                if "error" in r:
+                    r.pop("meta", None)
+                    continue
+                h, w = img.shape[:2]
+                r["meta"].update({"width": int(w), "height": int(h)})
+                if meta:
+                    continue
+                if out is None:
+                    out = render_redactions(img, r["meta"], blur_ksize=blur_ksize, blur_sigma=blur_sigma, inplace=True)
+                try:
+                    r["encoded"], _ = image_encode.encode(out, fmt, quality=quality, compression=compression)
+                except ValueError as e:
+                    r["error"] = str(e)
+            return records
+        return await run_in_threadpool(finish)
+
+    chunks = ordered_chunks(entries, batch_size, process, window=POOL.workers)
+
+    async def ndjson():
+        try:
+            async for records in chunks:
+                for r in records:
+                    encoded = r.pop("encoded", None)
+                    if encoded is not None:
+                        r["image"] = base64.b64encode(encoded).decode("ascii")
+                        r["image_type"] = image_encode.FORMATS[fmt][1]
+                    yield json.dumps(r, separators=(",", ":")) + "\n"
+        finally:
+            await chunks.aclose()  # cancel chunks still in flight before their inputs go
+            close_inputs()
+
+    async def zipped():
+        try:
+            z = ZipStream()
+            async for records in chunks:
+                for r in records:
+                    stem = f"{r['index']:05d}_{os.path.splitext(os.path.basename(r['filename']))[0]}"
+                    encoded = r.pop("encoded", None)
+                    if encoded is not None:
+                        yield z.add(f"{stem}{ext}", encoded)
+                    yield z.add(f"{stem}.json", json.dumps(r).encode(), compress=True)
+            yield z.close()
+        finally:
+            await chunks.aclose()
+            close_inputs()
+
+    if format == "zip":
+        return StreamingResponse(
+            zipped(), media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="redacted.zip"'},
+        )
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @app.post("/redact-video/")  # allow trailing slash too
 @app.post("/redact-video")
@@ -62,29 +421,52 @@ async def redact_video_api(
     effect: str = Query("blur"),          # "blur" | "pixelate" | "black" (see video_obj.apply_effect)
     blur_k: int = Query(51, ge=1),
     vid_stride: int = Query(1, ge=1),
+    detect_every: int = Query(1, ge=1, description="Run the model every N frames and track masks in between"),
+    track_margin: int = Query(8, ge=0),
+    pipeline: str = Query("object", pattern="^(object|ocr|all)$"),
+    ocr_threshold: float = Query(0.03, ge=0.0, le=1.0, description="Frame change score that triggers a new OCR pass"),
+    segments: int = Query(VIDEO_SEGMENTS, ge=0, description="Split into up to N segments redacted in parallel (0 = one per worker)"),
     return_meta: bool = Query(False),
     background_tasks: BackgroundTasks = None,
 ):
+    # Fail fast before buffering the upload if no worker can take it
+    if yolo_model not in ALLOWED_YOLOE:
+        return model_not_allowed(yolo_model)
+    if POOL.saturated():
+        return pool_error(PoolSaturated())
+
     # Save upload to a temp file
     suffix = os.path.splitext(file.filename or ".mp4")[1] or ".mp4"
     in_fd, in_path = tempfile.mkstemp(suffix=suffix)
     out_fd, out_path = tempfile.mkstemp(suffix=".mp4")
     os.close(in_fd); os.close(out_fd)
     try:
-        with open(in_path, "wb") as f:
-            f.write(await file.read())
+        await save_upload(file, in_path)
 
-        meta = redact_video(
-            src_path=in_path,
-            out_path=out_path,
+        params = dict(
             yolo_model=yolo_model,
             effect=effect,
             blur_k=blur_k,
             vid_stride=vid_stride,
+            detect_every=detect_every,
+            track_margin=track_margin,
+            pipeline=pipeline,
+            ocr_threshold=ocr_threshold,
         )
+        if segments != 1:
+            meta = await POOL.redact_video_segmented(in_path, out_path, segments=segments, **params)
+        else:
+            meta = await POOL.redact_video(src_path=in_path, out_path=out_path, **params)
+        metrics.observe_video(meta)
+        metrics.observe_stages("video", meta.get("timings"))
 
         if return_meta:
-            # Serve metadata and keep file path for reference
+            # Only metadata is returned, so nothing on disk is needed anymore
+            for path in (in_path, out_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
             return JSONResponse(meta)
 
         # Stream the produced MP4 and clean up afterward
@@ -106,4 +488,69 @@ async def redact_video_api(
             os.remove(out_path)
         except Exception:
             pass
-        return JSONResponse({"error": str(e)}, status_code=500)
\ No newline at end of file
+        if isinstance(e, (PoolSaturated, PoolUnavailable)):
+            return pool_error(e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.post("/video-jobs/")  # allow trailing slash too
+@app.post("/video-jobs")
+async def create_video_job(
+    file: UploadFile = File(...),
+    yolo_model: str = Query("model.pt"),
+    effect: str = Query("blur"),          # "blur" | "pixelate" | "black"
+    blur_k: int = Query(51, ge=1),
+    vid_stride: int = Query(1, ge=1),
+    detect_every: int = Query(1, ge=1),
+    track_margin: int = Query(8, ge=0),
+    pipeline: str = Query("object", pattern="^(object|ocr|all)$"),
+    ocr_threshold: float = Query(0.03, ge=0.0, le=1.0),
+    segments: int = Query(VIDEO_SEGMENTS, ge=0, description="Split into up to N segments redacted in parallel (0 = one per worker)"),
+):
+    """Start a background redaction job; poll GET /video-jobs/{id} for progress."""
+    if yolo_model not in ALLOWED_YOLOE:
+        return model_not_allowed(yolo_model)
+    if POOL.saturated():
+        return pool_error(PoolSaturated())
+    if JOBS.full():
+        return JSONResponse({"error": "Too many jobs, retry later"}, status_code=429, headers={"Retry-After": "10"})
+    job = await JOBS.create(file, {
+        "yolo_model": yolo_model,
+        "effect": effect,
+        "blur_k": blur_k,
+        "vid_stride": vid_stride,
+        "detect_every": detect_every,
+        "track_margin": track_margin,
+        "pipeline": pipeline,
+        "ocr_threshold": ocr_threshold,
+    }, segments=segments)
+    return JSONResponse(
+        {
+            **job.info(),
+            "status_url": f"/video-jobs/{job.id}",
+            "result_url": f"/video-jobs/{job.id}/result",
+        },
+        status_code=202,
+    )
+
+@app.get("/video-jobs/{job_id}")
+async def video_job_status(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return job.info()
+
+@app.get("/video-jobs/{job_id}/result")
+async def video_job_result(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    if job.status != "done":
+        return JSONResponse(job.info(), status_code=409)
+    return FileResponse(job.out_path, media_type="video/mp4", filename=job.filename)
+
+@app.delete("/video-jobs/{job_id}")
+async def cancel_video_job(job_id: str):
+    job = JOBS.delete(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return {"job_id": job.id, "status": job.status}
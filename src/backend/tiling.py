@@ -0,0 +1,187 @@
+"""
+Tiled processing for images too large to handle in one piece.
+
+Detection runs on overlapping tiles, so small text keeps its resolution instead
+of being squeezed into PaddleOCR's 1024 px detection limit. Polygons are
+shifted to global coordinates, and seam duplicates are merged: inside the
+overlap of two tiles both see the same pixels, so the same object yields
+matching boxes there (see merge_seams).
+
+Effects run tile by tile straight into the source array, reading each tile with
+a halo of k//2 px. The original pixels that later tiles need as context are
+kept in small strips, and each polygon is rasterized once in image coordinates
+(a crop would clip it and fill different edge pixels), so the result is
+identical to a full-frame effects.apply_effect. Beyond the polygons' own
+bounding boxes, peak memory stays proportional to the tile size.
+"""
+import os
+import cv2
+import numpy as np
+import effects
+from ocr_detect import _polys_to_rects, _overlapping_pairs
+
+
+def open_image(path: str):
+    """
+    Read an image for tiled processing. .npy arrays are memory-mapped as they
+    are; encoded files are memory-mapped and decoded from the mapping, so the
+    encoded bytes are never copied into the Python heap.
+    """
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="c")  # copy-on-write: redacting never touches the file
+    if os.path.getsize(path) == 0:
+        return None
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    try:
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+    finally:
+        del data
+
+
+def tile_grid(h: int, w: int, tile: int, overlap: int = 0):
+    """(x0, y0, x1, y1) tiles of at most tile x tile px covering the image, neighbours sharing `overlap` px."""
+    step = max(1, tile - overlap)
+    def starts(n):
+        s = list(range(0, max(1, n - overlap), step)) if n > tile else [0]
+        if s[-1] + tile < n:
+            s.append(n - tile)
+        return s
+    return [(x0, y0, min(w, x0 + tile), min(h, y0 + tile)) for y0 in starts(h) for x0 in starts(w)]
+
+
+def _area(lo, hi):
+    return np.clip(hi - lo, 0, None).prod(axis=-1)
+
+
+def merge_seams(polys, tile_ids, tiles, texts=None):
+    """
+    Merge detections of the same thing reported by overlapping tiles.
+    Two detections from different tiles are the same when, clipped to the
+    overlap of their tiles, their boxes cover at least half of each other.
+    A group becomes its largest member if that contains the others, otherwise
+    the convex hull of all of them (texts joined in reading order).
+    Returns (polys, texts).
+    """
+    n = len(polys)
+    if n < 2:
+        return list(polys), list(texts) if texts is not None else None
+    polys_pts, rects = _polys_to_rects(polys)
+    tile_ids = np.asarray(tile_ids)
+    tiles = np.asarray(tiles, dtype=np.int64)
+
+    parent = list(range(n))
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for a, b in _overlapping_pairs(rects):
+        cross = tile_ids[a] != tile_ids[b]
+        a, b = a[cross], b[cross]
+        if not len(a):
+            continue
+        ta, tb = tiles[tile_ids[a]], tiles[tile_ids[b]]
+        zone_lo = np.maximum(ta[:, :2], tb[:, :2])
+        zone_hi = np.minimum(ta[:, 2:], tb[:, 2:])
+        a_lo, a_hi = np.maximum(rects[a, :2], zone_lo), np.minimum(rects[a, 2:], zone_hi)
+        b_lo, b_hi = np.maximum(rects[b, :2], zone_lo), np.minimum(rects[b, 2:], zone_hi)
+        inter = _area(np.maximum(a_lo, b_lo), np.minimum(a_hi, b_hi))
+        smaller = np.minimum(_area(a_lo, a_hi), _area(b_lo, b_hi))
+        same = (smaller > 0) & (inter * 2 >= smaller)
+        for i, j in zip(a[same].tolist(), b[same].tolist()):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[rj] = ri
+
+    groups = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+
+    areas = _area(rects[:, :2], rects[:, 2:])
+    out_polys, out_texts = [], []
+    for idxs in groups.values():
+        if len(idxs) == 1:
+            out_polys.append(polys[idxs[0]])
+            if texts is not None:
+                out_texts.append(texts[idxs[0]])
+            continue
+        best = max(idxs, key=lambda k: areas[k])
+        lo, hi = rects[idxs, :2].min(axis=0), rects[idxs, 2:].max(axis=0)
+        if (rects[best, :2] <= lo).all() and (rects[best, 2:] >= hi).all():
+            out_polys.append(polys[best])
+            if texts is not None:
+                out_texts.append(texts[best])
+            continue
+        pts = np.vstack([polys_pts[k] for k in idxs])
+        out_polys.append(cv2.convexHull(pts).reshape(-1, 2))
+        if texts is not None:
+            order = sorted(idxs, key=lambda k: (rects[k][1], rects[k][0]))
+            out_texts.append(" ".join(texts[k] for k in order).strip())
+    return out_polys, (out_texts if texts is not None else None)
+
+
+def blur_tiled(img: np.ndarray, polys, tile: int = 2048, k: int = 201, sigma: float = 0.0):
+    """
+    Gaussian blur inside `polys`, written into `img` (which may be an np.memmap)
+    one tile at a time. Same pixels as effects.apply_effect on the full mask:
+    each polygon is filled once on its bounding box (clipped to the image,
+    which is where the full-frame fill clips it too) and every tile slices
+    its mask out of that, kept until the bands have passed the polygon.
+    Returns img.
+    """
+    H, W = img.shape[:2]
+    k = k if k % 2 == 1 else k + 1
+    halo = k // 2
+    tile = max(tile, 2 * halo + 1)  # a strip of context never spans two tiles
+    if not len(polys):
+        return img
+    polys_pts, rects = _polys_to_rects(polys)
+    boxes = np.concatenate([np.maximum(rects[:, :2], 0), np.minimum(rects[:, 2:], (W, H))], axis=1)
+    shapes = {}  # polygon index -> its filled mask over boxes[i]
+
+    def shape(i):
+        if i not in shapes:
+            x0, y0, x1, y1 = boxes[i].tolist()
+            m = np.zeros((y1 - y0, x1 - x0), np.uint8)
+            cv2.fillPoly(m, [(polys_pts[i] - (x0, y0)).astype(np.int32).reshape(-1, 1, 2)], 255)
+            shapes[i] = m
+        return shapes[i]
+
+    top = None  # original pixels of the rows just above the current band
+    for y0 in range(0, H, tile):
+        y1 = min(H, y0 + tile)
+        cy0, cy1 = max(0, y0 - halo), min(H, y1 + halo)
+        for i in [i for i in shapes if boxes[i, 3] <= cy0]:
+            del shapes[i]  # bands only move down
+        next_top = np.array(img[y1 - halo:y1]) if halo and y1 < H else None
+        left = None
+        for x0 in range(0, W, tile):
+            x1 = min(W, x0 + tile)
+            cx0, cx1 = max(0, x0 - halo), min(W, x1 + halo)
+            hit = (boxes[:, 0] < cx1) & (boxes[:, 2] > cx0) & (boxes[:, 1] < cy1) & (boxes[:, 3] > cy0)
+            crop = None
+            if hit.any():
+                crop = np.array(img[cy0:cy1, cx0:cx1])
+                # Context already redacted by earlier tiles is put back to the original
+                if top is not None and y0 > cy0:
+                    crop[:y0 - cy0] = top[:, cx0:cx1]
+                if left is not None and x0 > cx0:
+                    crop[:, :x0 - cx0] = left
+            nx0 = max(0, x1 - halo)
+            if halo and x1 < W:
+                left = crop[:, nx0 - cx0:x1 - cx0].copy() if crop is not None else np.array(img[cy0:cy1, nx0:x1])
+                if crop is None and top is not None and y0 > cy0:
+                    left[:y0 - cy0] = top[:, nx0:x1]
+            if crop is None:
+                continue
+            mask = np.zeros(crop.shape[:2], np.uint8)
+            for i in np.flatnonzero(hit).tolist():
+                bx0, by0, bx1, by1 = boxes[i].tolist()
+                ix0, iy0, ix1, iy1 = max(bx0, cx0), max(by0, cy0), min(bx1, cx1), min(by1, cy1)
+                part = mask[iy0 - cy0:iy1 - cy0, ix0 - cx0:ix1 - cx0]
+                np.maximum(part, shape(i)[iy0 - by0:iy1 - by0, ix0 - bx0:ix1 - bx0], out=part)
+            crop = effects.apply_effect(crop, mask, effect="blur", k=k, sigma=sigma, inplace=True)
+            img[y0:y1, x0:x1] = crop[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+        top = next_top
+    return img
@@ -0,0 +1,199 @@
+"""
+Background video redaction jobs.
+
+POST streams the upload to a per-job temp directory and returns immediately;
+the redaction runs in the inference pool while clients poll for progress.
+Progress and cancellation cross the process boundary through a tiny shared
+int64 block [frames_done, frames_total, cancel_flag] owned by the job, plus a
+(done, total) pair per segment when the video is split across workers.
+
+Job directories are removed when a job is deleted, when a finished job's
+result is older than `ttl` seconds, and on shutdown.
+"""
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import tempfile
+from multiprocessing import shared_memory
+import numpy as np
+from video_pipeline import VideoCancelled
+import video_segments
+import metrics
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+async def save_upload(upload, path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """Copy an UploadFile to path chunk by chunk instead of buffering it whole. Returns bytes written."""
+    size = 0
+    with open(path, "wb") as f:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+class VideoJob:
+    def __init__(self, root: str, filename: str, params: dict, segments: int = 1):
+        self.id = uuid.uuid4().hex
+        self.workdir = tempfile.mkdtemp(prefix=f"job-{self.id[:8]}-", dir=root)
+        suffix = os.path.splitext(filename or ".mp4")[1] or ".mp4"
+        self.in_path = os.path.join(self.workdir, f"input{suffix}")
+        self.out_path = os.path.join(self.workdir, "redacted.mp4")
+        self.filename = os.path.basename(filename or "redacted.mp4")
+        self.params = params
+        self.status = "uploading"  # -> processing -> done | failed | cancelled
+        self.error = None
+        self.meta = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.task = None
+        self.segments = max(1, segments)
+        n = 3 + (2 * self.segments if self.segments > 1 else 0)
+        self._shm = shared_memory.SharedMemory(create=True, size=n * 8)
+        self.state = np.ndarray((n,), dtype=np.int64, buffer=self._shm.buf)
+        self.state[:] = 0
+
+    @property
+    def progress_name(self):
+        return self._shm.name
+
+    def info(self) -> dict:
+        done = total = 0
+        if self.state is not None:
+            per_segment = self.state[3:].reshape(-1, 2)
+            done = int(self.state[0] + per_segment[:, 0].sum())
+            total = int(self.state[1] or per_segment[:, 1].sum())
+        if self.meta is not None:
+            done = total = self.meta["frames_out"]
+        fps = eta = None
+        if self.started is not None and done:
+            elapsed = (self.finished or time.time()) - self.started
+            fps = done / elapsed if elapsed > 0 else None
+            if fps and total > done and self.status == "processing":
+                eta = (total - done) / fps
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "frames_done": done,
+            "frames_total": total or None,
+            "fps": round(fps, 2) if fps else None,
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "error": self.error,
+            "meta": self.meta,
+        }
+
+    def release(self):
+        """Drop the progress block and every file of this job."""
+        if self.state is not None:
+            self.state = None
+            self._shm.close()
+            self._shm.unlink()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class JobStore:
+    def __init__(self, pool, root: str = None, ttl: float = 3600.0, max_jobs: int = 64):
+        self.pool = pool
+        self.root = root
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self._reaper = None
+
+    def full(self) -> bool:
+        self.purge_expired()
+        return len(self.jobs) >= self.max_jobs
+
+    async def create(self, upload, params: dict, segments: int = 1) -> VideoJob:
+        """
+        Stream the upload to disk and start processing it in the background,
+        split into up to `segments` parallel segments (0 = one per worker).
+        """
+        job = VideoJob(self.root, upload.filename, params, segments or self.pool.workers)
+        self.jobs[job.id] = job
+        try:
+            await save_upload(upload, job.in_path)
+        except BaseException:
+            self.jobs.pop(job.id, None)
+            job.release()
+            raise
+        job.status = "processing"
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: VideoJob):
+        job.started = time.time()
+        try:
+            if job.segments > 1:
+                info = await asyncio.to_thread(video_segments.probe, job.in_path)
+                job.state[1] = -(-info["frames"] // job.params.get("vid_stride", 1))
+                job.meta = await self.pool.redact_video_segmented(
+                    job.in_path, job.out_path, segments=job.segments, progress_name=job.progress_name, **job.params
+                )
+            else:
+                job.meta = await self.pool.redact_video_job(
+                    job.progress_name, src_path=job.in_path, out_path=job.out_path, **job.params
+                )
+            metrics.observe_video(job.meta)
+            metrics.observe_stages("video", job.meta.get("timings"))
+            job.status = "done"
+        except (VideoCancelled, asyncio.CancelledError):
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            try:
+                os.remove(job.in_path)  # only the result is kept
+            except OSError:
+                pass
+
+    def get(self, job_id: str):
+        self.purge_expired()
+        return self.jobs.get(job_id)
+
+    def delete(self, job_id: str):
+        """Cancel a running job (or drop a finished one) and remove its files."""
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return None
+        if job.finished is None:
+            if job.state is not None:
+                job.state[2] = 1  # the worker checks this between frames
+            if job.task is not None:
+                job.task.cancel()
+            job.status = "cancelled"
+        job.release()
+        return job
+
+    def purge_expired(self):
+        now = time.time()
+        for job_id in [j.id for j in self.jobs.values() if j.finished is not None and now - j.finished > self.ttl]:
+            self.delete(job_id)
+
+    def start_reaper(self, interval: float = None):
+        """Purge expired jobs every `interval` s (default ttl/4, 1-60 s), so an idle server frees its disk too."""
+        interval = interval or max(1.0, min(60.0, self.ttl / 4))
+
+        async def reap():
+            while True:
+                await asyncio.sleep(interval)
+                self.purge_expired()
+
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(reap())
+
+    def shutdown(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for job_id in list(self.jobs):
+            self.delete(job_id)
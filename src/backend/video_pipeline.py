@@ -0,0 +1,343 @@
+"""
+Staged video redaction.
+
+    decode -> [change-triggered OCR] -> batched inference -> mask/effect workers -> ordered encode
+
+Each stage runs in its own thread (the encoder runs in the caller's thread) and
+hands frames on through bounded queues, so decoding, model inference, effects
+and encoding overlap instead of running back to back. OpenCV and torch release
+the GIL in their native code, which is where almost all of the time goes.
+"""
+import time
+import queue
+import threading
+import cv2
+import numpy as np
+import ocr_detect
+import pii_detect
+import barcode_detect
+import video_object_detect
+
+_END = object()  # end-of-stream marker
+
+
+class VideoCancelled(Exception):
+    """Raised by run() when its cancel() callback returns True."""
+
+
+def text_mask(frame, merge_dist: int = 12):
+    """Mask of PII text lines and barcodes in one frame (the image 'ocr' pipeline)."""
+    mask = np.zeros(frame.shape[:2], np.uint8)
+    rec_texts, rec_polys = ocr_detect.predict(frame, merge_dist=merge_dist)
+    redacted_texts, _ = pii_detect.predict_batch(rec_texts)
+    for text, redacted_text, box in zip(rec_texts, redacted_texts, rec_polys):
+        if redacted_text != text:
+            cv2.fillPoly(mask, [np.asarray(box, dtype=np.int32).reshape(-1, 1, 2)], 255)
+    for pts in barcode_detect.predict(frame):
+        cv2.fillPoly(mask, [pts.reshape(-1, 1, 2)], 255)
+    return mask
+
+
+def change_thumb(frame):
+    """Small grayscale thumbnail used to score scene changes cheaply."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (96, 54), interpolation=cv2.INTER_AREA)
+
+
+def change_score(thumb_a, thumb_b) -> float:
+    """Mean absolute difference of two thumbnails, 0 (same) .. 1."""
+    return float(cv2.absdiff(thumb_a, thumb_b).mean()) / 255.0
+
+
+class _Stage:
+    """Frames handled and seconds spent working (excludes time blocked on queues)."""
+    def __init__(self):
+        self.items = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items, seconds):
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+
+    def report(self):
+        return {
+            "frames": self.items,
+            "busy_s": round(self.busy, 3),
+            "fps": round(self.items / self.busy, 2) if self.busy > 0 else None,
+        }
+
+
+class _Queue(queue.Queue):
+    """Bounded queue that records its depth each time an item is put."""
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._samples = 0
+
+    def put_until(self, item, stop):
+        """Put unless the pipeline is stopping. Returns False if it gave up."""
+        depth = self.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_sum += depth
+        self._samples += 1
+        while not stop.is_set():
+            try:
+                self.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get_until(self, stop):
+        while not stop.is_set():
+            try:
+                return self.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def report(self):
+        return {
+            "capacity": self.maxsize,
+            "max_depth": self.max_depth,
+            "mean_depth": round(self._depth_sum / self._samples, 2) if self._samples else 0.0,
+        }
+
+
+def run(model,
+        src_path: str,
+        writer,
+        device: str = "cpu",
+        effect: str = "blur",
+        blur_k: int = 201,
+        vid_stride: int = 1,
+        detect_every: int = 1,
+        track_margin: int = 8,
+        batch_size: int = 4,
+        effect_workers: int = 2,
+        queue_size: int = 8,
+        progress=None,
+        cancel=None,
+        text: bool = False,
+        merge_dist: int = 12,
+        ocr_threshold: float = 0.03,
+        start_frame: int = 0,
+        end_frame: int = None) -> dict:
+    """
+    Redact src_path frame by frame into writer.
+    model=None skips object detection.
+    text=True adds OCR+PII+barcode redaction: a full OCR pass runs only when the
+    frame differs from the one last OCR'd by more than ocr_threshold (see
+    change_score); other frames reuse that text mask, grown by track_margin.
+    vid_stride > 1 keeps only every vid_stride-th frame (like ultralytics).
+    start_frame/end_frame limit decoding to that range of source frames (end
+    exclusive, None = to the end); frame indices restart at 0 there.
+    detect_every > 1 runs the model on every Nth frame only and propagates
+    masks to the frames in between (see video_object_detect.propagate_mask).
+    progress(frames_written) is called as frames are encoded; when cancel()
+    returns True the stages are stopped and VideoCancelled is raised.
+    Returns frame counts plus per-stage throughput and queue depths.
+    """
+    vid_stride = max(1, int(vid_stride))
+    detect_every = max(1, int(detect_every))
+    batch_size = max(1, int(batch_size))
+    effect_workers = max(1, int(effect_workers))
+
+    stop = threading.Event()
+    errors = []
+    stages = {name: _Stage() for name in ("decode", "text", "infer", "effect", "encode")}
+    q_frames = _Queue(queue_size)
+    q_text = _Queue(queue_size) if text else q_frames
+    q_masks = _Queue(queue_size)
+    q_out = _Queue(queue_size)
+    counts = {"frames_in": 0, "keyframes": 0, "ocr_passes": 0}
+
+    def guarded(fn):
+        def target():
+            try:
+                fn()
+            except BaseException as e:  # surface in the caller, stop the other stages
+                errors.append(e)
+                stop.set()
+        return target
+
+    def decode():
+        cap = cv2.VideoCapture(src_path)
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        try:
+            idx, pos = 0, start_frame
+            while not stop.is_set() and (end_frame is None or pos < end_frame):
+                t0 = time.perf_counter()
+                ok, frame = cap.read()
+                for _ in range(vid_stride - 1):
+                    if not cap.grab():
+                        break
+                pos += vid_stride
+                if not ok:
+                    break
+                stages["decode"].add(1, time.perf_counter() - t0)
+                if not q_frames.put_until((idx, frame, None), stop):
+                    return
+                idx += 1
+            counts["frames_in"] = idx
+        finally:
+            cap.release()
+            q_frames.put_until(_END, stop)
+
+    def ocr():
+        ref_thumb = tmask = None
+        try:
+            while True:
+                item = q_frames.get_until(stop)
+                if item is _END:
+                    break
+                idx, frame, _ = item
+                t0 = time.perf_counter()
+                thumb = change_thumb(frame)
+                if ref_thumb is None or change_score(ref_thumb, thumb) > ocr_threshold:
+                    tmask, ref_thumb = text_mask(frame, merge_dist), thumb
+                    counts["ocr_passes"] += 1
+                    item = (idx, frame, (tmask, 0))
+                else:
+                    item = (idx, frame, (tmask, track_margin))  # reused; allow for small motion
+                stages["text"].add(1, time.perf_counter() - t0)
+                if not q_text.put_until(item, stop):
+                    return
+        finally:
+            q_text.put_until(_END, stop)
+
+    def infer():
+        mask = prev_gray = None
+        done = False
+        try:
+            while not done:
+                item = q_text.get_until(stop)
+                if item is _END:
+                    break
+                batch = [item]
+                while len(batch) < batch_size:
+                    try:
+                        item = q_text.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _END:
+                        done = True
+                        break
+                    batch.append(item)
+
+                t0 = time.perf_counter()
+                keys = [frame for idx, frame, _ in batch if model is not None and idx % detect_every == 0]
+                results = iter(
+                    model.predict(keys, device=device, imgsz=640, retina_masks=False, verbose=False) if keys else []
+                )
+                counts["keyframes"] += len(keys)
+                out = []
+                for idx, frame, tm in batch:
+                    if model is None:
+                        out.append((idx, frame, None, None, 0, tm))
+                        continue
+                    if detect_every == 1:
+                        # No tracking state: masks are built by the effect workers
+                        out.append((idx, frame, next(results), None, 0, tm))
+                        continue
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    margin = 0
+                    if idx % detect_every == 0:
+                        mask = video_object_detect.build_mask_from_results(next(results), gray.shape)
+                    elif mask.any():
+                        mask = video_object_detect.propagate_mask(prev_gray, gray, mask)
+                        margin = track_margin  # safety dilation for tracking drift
+                    prev_gray = gray
+                    out.append((idx, frame, None, mask, margin, tm))
+                stages["infer"].add(len(batch), time.perf_counter() - t0)
+                for o in out:
+                    if not q_masks.put_until(o, stop):
+                        return
+        finally:
+            for _ in range(effect_workers):
+                q_masks.put_until(_END, stop)
+
+    def apply():
+        try:
+            while True:
+                item = q_masks.get_until(stop)
+                if item is _END:
+                    break
+                idx, frame, r, mask, margin, tm = item
+                t0 = time.perf_counter()
+                if mask is None and r is not None:
+                    mask = video_object_detect.build_mask_from_results(r, frame.shape[:2])
+                if tm is not None:
+                    tmask, tmargin = tm
+                    mask = tmask if mask is None else cv2.bitwise_or(mask, tmask)
+                    margin = max(margin, tmargin)
+                if mask is not None and mask.any():
+                    frame = video_object_detect.apply_effect(frame, mask, effect=effect, k=blur_k, inplace=True, margin=margin)
+                stages["effect"].add(1, time.perf_counter() - t0)
+                if not q_out.put_until((idx, frame), stop):
+                    return
+        finally:
+            q_out.put_until(_END, stop)
+
+    threads = [threading.Thread(target=guarded(decode), name="video-decode", daemon=True),
+               threading.Thread(target=guarded(infer), name="video-infer", daemon=True)]
+    if text:
+        threads.append(threading.Thread(target=guarded(ocr), name="video-text", daemon=True))
+    threads += [threading.Thread(target=guarded(apply), name=f"video-effect-{i}", daemon=True)
+                for i in range(effect_workers)]
+    t_start = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    # Ordered encoder: effect workers finish out of order, write strictly by index
+    frames_out, pending, finished = 0, {}, 0
+    try:
+        while finished < effect_workers:
+            item = q_out.get_until(stop)
+            if item is _END:
+                if stop.is_set():
+                    break
+                finished += 1
+                continue
+            idx, frame = item
+            pending[idx] = frame
+            t0 = time.perf_counter()
+            written = 0
+            while frames_out in pending:
+                writer.write(pending.pop(frames_out))
+                frames_out += 1
+                written += 1
+            stages["encode"].add(written, time.perf_counter() - t0)
+            if progress is not None and written:
+                progress(frames_out)
+            if cancel is not None and cancel():
+                raise VideoCancelled(f"cancelled after {frames_out} frames")
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+    wall = time.perf_counter() - t_start
+    return {
+        "frames_in": counts["frames_in"],
+        "frames_out": frames_out,
+        "keyframes": counts["keyframes"],
+        "ocr_passes": counts["ocr_passes"],
+        "wall_s": round(wall, 3),
+        "fps": round(frames_out / wall, 2) if wall > 0 else None,
+        "stages": {name: s.report() for name, s in stages.items() if text or name != "text"},
+        "queues": {
+            "decoded": q_frames.report(),
+            **({"text": q_text.report()} if text else {}),
+            "masked": q_masks.report(),
+            "redacted": q_out.report(),
+        },
+    }
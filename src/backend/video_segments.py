@@ -0,0 +1,122 @@
+"""
+Splitting a video into segments for parallel redaction, and joining them back.
+
+plan() cuts the source into contiguous frame ranges whose starts are
+multiples of vid_stride * detect_every, so every segment starts on a frame the
+sequential run would also have kept and run the model on: the output frames
+(and keyframe cadence) are the same as one redact_video over the whole clip.
+A segment needs no overlap -- its first frame is a detection (and OCR) frame,
+so no tracking state crosses a boundary.
+
+Each segment is redacted into its own MP4 by a worker (main.redact_video with
+start_frame/end_frame); join() concatenates the parts in order: with ffmpeg's
+concat demuxer (stream copy, no re-encode) when ffmpeg is on PATH, otherwise
+by decoding the parts and writing them to one OpenCV writer.
+"""
+import os
+import shutil
+import subprocess
+import cv2
+
+
+def probe(path: str) -> dict:
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {path}")
+    try:
+        return {
+            "frames": max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))),
+            "fps": cap.get(cv2.CAP_PROP_FPS) or 25.0,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+
+def plan(n_frames: int, fps: float, segments: int, vid_stride: int = 1, detect_every: int = 1,
+         min_segment_s: float = 10.0):
+    """
+    Up to `segments` (start, end) source-frame ranges covering [0, n_frames),
+    each at least min_segment_s long. The last one is open-ended (end None)
+    because the container's frame count is only an estimate.
+    """
+    step = max(1, int(vid_stride)) * max(1, int(detect_every))
+    if n_frames <= 0 or segments <= 1:
+        return [(0, None)]
+    min_frames = max(step, int(min_segment_s * fps))
+    count = max(1, min(int(segments), n_frames // min_frames))
+    # Boundaries rounded down to the cadence
+    starts = sorted({(n_frames * i // count) // step * step for i in range(count)})
+    return [(a, b) for a, b in zip(starts, starts[1:] + [None])]
+
+
+def join(parts, out_path: str, fps: float, size) -> str:
+    """Concatenate the part files in order into out_path. Returns the method used."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        list_path = f"{out_path}.parts.txt"
+        with open(list_path, "w", encoding="utf-8") as f:
+            for p in parts:
+                f.write("file '{}'\n".format(os.path.abspath(p).replace("'", r"'\''")))
+        try:
+            subprocess.run(
+                [ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", out_path],
+                check=True, capture_output=True,
+            )
+            return "ffmpeg-concat"
+        except subprocess.CalledProcessError as e:
+            print(f"[video_segments] ffmpeg concat failed, re-encoding: {e.stderr.decode(errors='replace').strip()}")
+        finally:
+            os.remove(list_path)
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, tuple(size))
+    try:
+        for p in parts:
+            cap = cv2.VideoCapture(p)
+            try:
+                while True:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        writer.release()
+    return "opencv"
+
+
+def merge_meta(metas, out_path: str, wall_s: float, join_s: float, join_method: str) -> dict:
+    """One redact_video-style metadata dict for the segments' metadata (in order)."""
+    first = metas[0]
+    meta = {k: first[k] for k in ("width", "height", "fps", "pipeline", "detect_every", "effect", "model")}
+    for k in ("frames_in", "frames_out", "keyframes", "ocr_passes"):
+        meta[k] = sum(m[k] for m in metas)
+    stages = {}
+    for m in metas:
+        for name, s in m["stages"].items():
+            agg = stages.setdefault(name, {"frames": 0, "busy_s": 0.0})
+            agg["frames"] += s["frames"]
+            agg["busy_s"] += s["busy_s"]
+    for s in stages.values():
+        s["busy_s"] = round(s["busy_s"], 3)
+        s["fps"] = round(s["frames"] / s["busy_s"], 2) if s["busy_s"] > 0 else None
+    timings = {}
+    for m in metas:
+        for name, seconds in m.get("timings", {}).items():
+            timings[name] = round(timings.get(name, 0.0) + seconds, 4)  # summed over workers
+    timings["join"] = round(join_s, 4)
+    timings["total"] = round(wall_s, 4)
+    meta.update({
+        "output": out_path,
+        "throughput_fps": round(meta["frames_out"] / wall_s, 2) if wall_s > 0 else None,
+        "wall_s": round(wall_s, 3),
+        "stages": stages,
+        "timings": timings,
+        "segments": [
+            {"frames_out": m["frames_out"], "wall_s": m["wall_s"], "throughput_fps": m["throughput_fps"]}
+            for m in metas
+        ],
+        "join": join_method,
+    })
+    return meta
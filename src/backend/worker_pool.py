@@ -0,0 +1,335 @@
+"""
+Process pool for the blocking redaction calls.
+
+Each worker process loads its models once (in the pool initializer) and then
+serves requests. Decoded images travel through shared memory: the parent copies
+the pixels into a SharedMemory segment, the worker redacts them and writes the
+result back into the same segment, so only the small metadata dict is pickled.
+
+Admission control: at most `workers + queue_size` requests may be pending.
+Beyond that `PoolSaturated` is raised (HTTP 429); a pool that is not running or
+lost a worker raises `PoolUnavailable` (HTTP 503).
+"""
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+import metrics
+import video_segments
+
+
+class PoolSaturated(RuntimeError):
+    """All workers are busy and the wait queue is full."""
+
+
+class PoolUnavailable(RuntimeError):
+    """The pool is not running or a worker process died."""
+
+
+# --- worker side ---
+_WORKER_TIMINGS = {}
+
+def _init_worker(pipelines, yoloe_model):
+    import main
+    _WORKER_TIMINGS.update(main.warmup(pipelines, yoloe_model=yoloe_model))
+
+def _worker_ready():
+    return os.getpid(), dict(_WORKER_TIMINGS)
+
+def _worker_snapshot():
+    import pii_detect
+    from model_registry import MODELS
+    return {
+        "pid": os.getpid(),
+        "pii_cache": pii_detect.cache_stats(),
+        "pii_cascade": pii_detect.cascade_stats(),
+        "models": MODELS.report(),
+    }
+
+def _call(fn, *args):
+    """Run fn in the worker and attach a snapshot of the worker's counters."""
+    return fn(*args), _worker_snapshot()
+
+def _redact_shared(shm_name, shape, dtype, kwargs):
+    """Redact the image stored in shared memory in place and return its metadata."""
+    import main
+    shm = shared_memory.SharedMemory(name=shm_name)
+    img = out = None
+    try:
+        img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        out, meta = main.redact_image(img, inplace=True, **kwargs)
+        if out is not img:
+            img[...] = out
+        return meta
+    except Exception as e:
+        # Tracebacks keep frames alive, and those frames hold views on the segment
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        img = out = None
+        shm.close()
+
+def _redact_shared_batch(shm_name, layout, kwargs):
+    """redact_images over images packed back to back in one segment; layout is [(offset, shape, dtype)]."""
+    import main
+    shm = shared_memory.SharedMemory(name=shm_name)
+    imgs = results = None
+    try:
+        imgs = [np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset) for offset, shape, dtype in layout]
+        results = main.redact_images(imgs, inplace=True, **kwargs)
+        for img, (out, _) in zip(imgs, results):
+            if out is not img:
+                img[...] = out
+        return [meta for _, meta in results]
+    except Exception as e:
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        imgs = results = None
+        shm.close()
+
+def _redact_video(kwargs):
+    import main
+    return main.redact_video(**kwargs)
+
+def _redact_video_job(progress_name, kwargs, slot=None):
+    """
+    redact_video wired to a shared int64 block: [frames_done, frames_total, cancel_flag],
+    followed by a (done, total) pair per segment; segment `slot` reports into its pair.
+    """
+    import main
+    shm = shared_memory.SharedMemory(name=progress_name)
+    i = 0 if slot is None else 3 + 2 * slot
+    state = np.ndarray((max(3, i + 2),), dtype=np.int64, buffer=shm.buf)
+    def progress(done, total):
+        state[i], state[i + 1] = done, total
+    try:
+        return main.redact_video(progress=progress, cancel=lambda: bool(state[2]), **kwargs)
+    except Exception as e:
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        state = None
+        shm.close()
+
+
+# --- parent side ---
+SEGMENT_RETRIES = 8  # waits for a free worker slot per video segment, up to ~13 s
+def default_workers():
+    """Worker count from REDACT_WORKERS ('auto' = cores available to this process)."""
+    value = os.getenv("REDACT_WORKERS", "1").strip().lower()
+    if value == "auto":
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except AttributeError:
+            return max(1, os.cpu_count() or 1)
+    return max(1, int(value))
+
+
+class InferencePool:
+    def __init__(self, workers: int = 1, queue_size: int = 8, pipelines=("ocr",), yoloe_model: str = "model.pt"):
+        self.workers = max(1, int(workers))
+        self.queue_size = max(0, int(queue_size))
+        self.pipelines = tuple(pipelines)
+        self.yoloe_model = yoloe_model
+        self._executor = None
+        self._pending = 0
+        self._rejected = 0
+        self._snapshots = {}  # pid -> latest _worker_snapshot()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("spawn"),  # torch/paddle are not fork-safe
+                    initializer=_init_worker,
+                    initargs=(self.pipelines, self.yoloe_model),
+                )
+        return self
+
+    def warmup(self) -> dict:
+        """Spawn the workers, wait for their models, and return {pid: {model: load_seconds}}."""
+        self.start()
+        futures = [self._executor.submit(_call, _worker_ready) for _ in range(self.workers)]
+        ready = {}
+        for f in futures:
+            (pid, timings), snapshot = f.result()
+            self._snapshots[pid] = snapshot
+            ready[pid] = timings
+        return ready
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "pending": self._pending,
+            "capacity": self.workers + self.queue_size,
+            "rejected": self._rejected,
+        }
+
+    def worker_counters(self) -> dict:
+        """PII verdict-cache and cascade counters summed over the workers' latest snapshots."""
+        totals, cascade = {}, {}
+        for snap in list(self._snapshots.values()):
+            for k, v in snap["pii_cache"].items():
+                if k != "hit_rate":
+                    totals[k] = totals.get(k, 0) + v
+            for k, v in snap["pii_cascade"].items():
+                if k not in ("mode", "skip_rate"):
+                    cascade[k] = cascade.get(k, 0) + v
+        lookups = totals.get("hits", 0) + totals.get("misses", 0)
+        totals["hit_rate"] = round(totals.get("hits", 0) / lookups, 4) if lookups else 0.0
+        lines = cascade.get("lines", 0)
+        cascade["skip_rate"] = round((lines - cascade.get("model", 0)) / lines, 4) if lines else 0.0
+        return {"workers_reporting": len(self._snapshots), "pii_cache": totals, "pii_cascade": cascade}
+
+    def worker_models(self) -> dict:
+        """{pid: model registry report} from the workers' latest snapshots."""
+        return {pid: snap["models"] for pid, snap in list(self._snapshots.items())}
+
+    def saturated(self) -> bool:
+        return self._pending >= self.workers + self.queue_size
+
+    def _admit(self):
+        with self._lock:
+            if self._executor is None:
+                raise PoolUnavailable("inference pool is not running")
+            if self.saturated():
+                self._rejected += 1
+                metrics.POOL_REJECTED.inc()
+                raise PoolSaturated("inference pool is saturated")
+            self._pending += 1
+            return self._executor
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _restart(self, broken):
+        # A dead worker breaks the whole executor; replace it for later requests
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    async def run(self, fn, *args):
+        executor = self._admit()
+        try:
+            future = executor.submit(_call, fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._release()
+            raise PoolUnavailable(str(e)) from e
+        future.add_done_callback(self._release)
+        try:
+            result, snapshot = await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            self._restart(executor)
+            raise PoolUnavailable("worker process died") from e
+        self._snapshots[snapshot["pid"]] = snapshot
+        return result
+
+    async def redact_image(self, img: np.ndarray, **kwargs):
+        """Same contract as main.redact_image, executed in a worker process."""
+        shm = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+        try:
+            view = np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)
+            view[...] = img
+            meta = await self.run(_redact_shared, shm.name, img.shape, img.dtype.str, kwargs)
+            out = view.copy()
+            return out, meta
+        finally:
+            view = None
+            shm.close()
+            shm.unlink()
+
+    async def redact_images(self, imgs, **kwargs):
+        """Same contract as main.redact_images; the whole list is one pool request and one segment."""
+        layout, offset = [], 0
+        for img in imgs:
+            layout.append((offset, img.shape, img.dtype.str))
+            offset += img.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+        views = []
+        try:
+            for img, (start, shape, dtype) in zip(imgs, layout):
+                views.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start))
+                views[-1][...] = img
+            metas = await self.run(_redact_shared_batch, shm.name, layout, kwargs)
+            return [(view.copy(), meta) for view, meta in zip(views, metas)]
+        finally:
+            views = None
+            shm.close()
+            shm.unlink()
+
+    async def redact_video(self, **kwargs):
+        """Same contract as main.redact_video, executed in a worker process."""
+        return await self.run(_redact_video, kwargs)
+
+    async def redact_video_job(self, progress_name: str, **kwargs):
+        """redact_video reporting progress through (and cancellable via) a shared block."""
+        return await self.run(_redact_video_job, progress_name, kwargs)
+
+    async def redact_video_segmented(self, src_path: str, out_path: str, segments: int = 0,
+                                     min_segment_s: float = 10.0, progress_name: str = None, **kwargs):
+        """
+        redact_video with the clip split into up to `segments` time segments
+        (0 = one per worker), each redacted by its own worker and joined in
+        order (see video_segments). With progress_name, segments report into
+        their slots of the job's progress block and share its cancel flag.
+        """
+        info = await asyncio.to_thread(video_segments.probe, src_path)
+        ranges = video_segments.plan(
+            info["frames"], info["fps"], segments or self.workers,
+            kwargs.get("vid_stride", 1), kwargs.get("detect_every", 1), min_segment_s,
+        )
+        if len(ranges) == 1:
+            if progress_name is not None:
+                return await self.redact_video_job(progress_name, src_path=src_path, out_path=out_path, **kwargs)
+            return await self.redact_video(src_path=src_path, out_path=out_path, **kwargs)
+
+        t0 = time.perf_counter()
+        workdir = tempfile.mkdtemp(prefix="segments-", dir=os.path.dirname(os.path.abspath(out_path)))
+        parts = [os.path.join(workdir, f"part{i:04d}.mp4") for i in range(len(ranges))]
+
+        async def segment(i, start, end):
+            seg = {**kwargs, "src_path": src_path, "out_path": parts[i], "start_frame": start, "end_frame": end}
+            for attempt in range(SEGMENT_RETRIES + 1):
+                try:
+                    if progress_name is not None:
+                        return await self.run(_redact_video_job, progress_name, seg, i)
+                    return await self.run(_redact_video, seg)
+                except PoolSaturated:
+                    if attempt == SEGMENT_RETRIES:
+                        raise
+                    await asyncio.sleep(min(2.0, 0.1 * 2 ** attempt))
+
+        tasks = [asyncio.ensure_future(segment(i, a, b)) for i, (a, b) in enumerate(ranges)]
+        try:
+            metas = await asyncio.gather(*tasks)
+            t_join = time.perf_counter()
+            method = await asyncio.to_thread(
+                video_segments.join, parts, out_path, info["fps"], (info["width"], info["height"]),
+            )
+            now = time.perf_counter()
+            return video_segments.merge_meta(metas, out_path, now - t0, now - t_join, method)
+        finally:
+            for t in tasks:
+                t.cancel()
+            shutil.rmtree(workdir, ignore_errors=True)